@@ -0,0 +1,21 @@
+"""
+Async Tool Helpers - Educational Buddy
+Keeps blocking tool functions (file parsing, SQLite access) off the agent event loop
+"""
+
+import asyncio
+import functools
+
+
+def run_in_thread(func):
+    """
+    Wrap a blocking tool function so ADK awaits it in a worker thread.
+    All chat requests share one agent event loop, so a tool that parses a file
+    or queries the database inline would stall every other conversation.
+    functools.wraps keeps the name, docstring and signature ADK reads to
+    build the tool declaration.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
@@ -5,15 +5,16 @@ Specialized agent for course analysis, study plan generation, and content organi
 
 from google.adk.agents import Agent
 from google.adk.tools.function_tool import FunctionTool
+from .shared_model import gemini_flash
+from .async_tools import run_in_thread
 from typing import Dict, Any, List, Optional
-import json
 from datetime import datetime, timedelta
 import sys
 import os
 
 # Add the parent directory to the path to import models
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import db
+from models import db, json_dumps
 
 def analyze_course_content(content: str, course_outline: str) -> Dict[str, Any]:
     """
@@ -443,14 +444,18 @@ def generate_study_plan(course_id: str, user_preferences: Dict[str, Any]) -> Dic
         plan_id = db.create_study_plan(course_id, course.user_id, study_plan)
         
         # Create individual study sessions in database
-        for session in study_plan["study_sessions"]:
-            db.create_study_session(
-                plan_id, course_id, course.user_id,
-                session["session_number"], session["title"], session["topics"],
-                session["scheduled_date"], session["estimated_duration"],
-                session["content_requirements"], 
-                json.dumps(session.get("session_guide", {}).get("detailed_activities", []))
-            )
+        db.create_study_sessions(plan_id, course_id, course.user_id, [
+            {
+                "session_number": session["session_number"],
+                "title": session["title"],
+                "topics": session["topics"],
+                "scheduled_date": session["scheduled_date"],
+                "estimated_duration": session["estimated_duration"],
+                "content_requirements": session["content_requirements"],
+                "study_guide": json_dumps(session.get("session_guide", {}).get("detailed_activities", []))
+            }
+            for session in study_plan["study_sessions"]
+        ])
         
         # Return comprehensive study plan ready for display
         return {
@@ -526,21 +531,8 @@ def update_study_plan_with_content(course_id: str, material_id: str, week_number
         if not study_plan:
             return {"status": "error", "error": "No study plan found for course"}
         
-        # Get study sessions that need this content
-        sessions = db.get_study_sessions(study_plan.id)
-        
-        # Find sessions that are waiting for this week's content
-        updated_sessions = 0
-        for session in sessions:
-            if (session.content_requirements.get("week_number") == week_number and 
-                session.content_requirements.get("content_status") == "pending"):
-                
-                # Update the session with the new material
-                session.content_requirements["required_materials"].append(material_id)
-                session.content_requirements["content_status"] = "uploaded"
-                
-                # Update in database (would need to add this method)
-                updated_sessions += 1
+        # Attach the material to sessions waiting for this week's content
+        updated_sessions = db.attach_material_to_pending_sessions(study_plan.id, week_number, material_id)
         
         return {
             "status": "success",
@@ -616,7 +608,7 @@ def get_study_session_guide(session_id: str) -> Dict[str, Any]:
 # Create the course planning agent
 course_planning_agent = Agent(
     name="course_planning_agent", 
-    model="gemini-2.0-flash",
+    model=gemini_flash,
     description=(
         "specialized in course analysis, study plan generation, content organization, "
         "and educational planning for personalized learning experiences"
@@ -653,10 +645,10 @@ You are the Course Planning Agent for an educational system. Your expertise incl
 Always focus on creating practical, achievable study plans that adapt to the student's learning style and schedule constraints.
 """,
     tools=[
-        FunctionTool(analyze_course_content),
-        FunctionTool(create_course_structure),
-        FunctionTool(generate_study_plan),
-        FunctionTool(update_study_plan_with_content),
-        FunctionTool(get_study_session_guide),
+        FunctionTool(run_in_thread(analyze_course_content)),
+        FunctionTool(run_in_thread(create_course_structure)),
+        FunctionTool(run_in_thread(generate_study_plan)),
+        FunctionTool(run_in_thread(update_study_plan_with_content)),
+        FunctionTool(run_in_thread(get_study_session_guide)),
     ],
 )
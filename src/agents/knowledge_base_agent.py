@@ -6,6 +6,8 @@ Integrates with SQLite database and vector storage for comprehensive knowledge m
 
 from google.adk.agents import Agent
 from google.adk.tools.function_tool import FunctionTool
+from .shared_model import gemini_flash
+from .async_tools import run_in_thread
 import sys
 import os
 import json
@@ -213,8 +215,7 @@ def get_study_plan_details(course_id: str) -> Dict[str, Any]:
             }
         
         # Get study sessions
-        study_sessions = db.get_study_sessions(study_plan.id)
-        sessions_data = [session.to_dict() for session in study_sessions]
+        sessions_data = db.get_study_sessions_data(study_plan.id)
         
         return {
             "status": "success",
@@ -330,17 +331,17 @@ When handling requests:
 You are the centralized knowledge repository that other agents depend on for course information.
 """
 
-# Create function tools for the knowledge base agent
-query_courses_tool = FunctionTool(query_user_courses)
-find_course_tool = FunctionTool(find_course_by_title)
-create_course_tool = FunctionTool(create_new_course)
-store_material_tool = FunctionTool(store_course_material)
-get_plan_tool = FunctionTool(get_study_plan_details)
-search_content_tool = FunctionTool(search_course_content)
+# Create function tools for the knowledge base agent (database calls run in worker threads)
+query_courses_tool = FunctionTool(run_in_thread(query_user_courses))
+find_course_tool = FunctionTool(run_in_thread(find_course_by_title))
+create_course_tool = FunctionTool(run_in_thread(create_new_course))
+store_material_tool = FunctionTool(run_in_thread(store_course_material))
+get_plan_tool = FunctionTool(run_in_thread(get_study_plan_details))
+search_content_tool = FunctionTool(run_in_thread(search_course_content))
 
 # Create the knowledge base agent using Google ADK with database tools
 knowledge_base_agent = Agent(
-    model="gemini-2.0-flash",
+    model=gemini_flash,
     name="knowledge_base_agent",
     instruction=_get_instruction_prompt(),
     output_key="knowledge_results",
@@ -17,6 +17,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from .knowledge_base_agent import knowledge_base_agent
 from .research_agent import research_agent
 from .course_planning_agent import course_planning_agent
+from .shared_model import gemini_flash
+from .async_tools import run_in_thread
 
 # Import file processing tools
 from tools.file_ingestion_tools import (
@@ -108,12 +110,12 @@ You are the workflow coordinator ensuring all course data flows through the cent
 """
 
 # Create function tools for file processing
-process_file_tool = FunctionTool(process_uploaded_file)
-extract_pdf_tool = FunctionTool(extract_text_from_pdf)
-extract_docx_tool = FunctionTool(extract_text_from_docx)
-extract_txt_tool = FunctionTool(extract_text_from_txt)
-chunk_content_tool = FunctionTool(chunk_content_for_analysis)
-analyze_structure_tool = FunctionTool(analyze_content_structure)
+process_file_tool = FunctionTool(run_in_thread(process_uploaded_file))
+extract_pdf_tool = FunctionTool(run_in_thread(extract_text_from_pdf))
+extract_docx_tool = FunctionTool(run_in_thread(extract_text_from_docx))
+extract_txt_tool = FunctionTool(run_in_thread(extract_text_from_txt))
+chunk_content_tool = FunctionTool(run_in_thread(chunk_content_for_analysis))
+analyze_structure_tool = FunctionTool(run_in_thread(analyze_content_structure))
 
 # Create agent tools for coordinating with other agents
 knowledge_base_tool = AgentTool(agent=knowledge_base_agent)
@@ -122,7 +124,7 @@ research_tool = AgentTool(agent=research_agent)
 
 # Create the main orchestrator agent using Google ADK
 orchestrator_agent = Agent(
-    model="gemini-2.0-flash",
+    model=gemini_flash,
     name="orchestrator_agent",
     instruction=_get_instruction_prompt(),
     output_key="orchestrator_results",
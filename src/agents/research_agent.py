@@ -5,6 +5,7 @@ Handles web search, external research, and real-world context gathering
 
 from google.adk.agents import Agent
 from google.adk.tools import google_search
+from .shared_model import gemini_flash
 
 def _get_instruction_prompt() -> str:
     """Get the instruction prompt for the Research Agent"""
@@ -32,7 +33,7 @@ Always include sources and citations in your responses.
 
 # Create the research agent using Google ADK
 research_agent = Agent(
-    model="gemini-2.0-flash",
+    model=gemini_flash,
     name="research_agent", 
     instruction=_get_instruction_prompt(),
     output_key="research_results",
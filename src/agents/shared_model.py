@@ -0,0 +1,12 @@
+"""
+Shared Model - Educational Buddy
+Single Gemini model instance used by every agent
+"""
+
+from google.adk.models import Gemini
+
+# When an agent's model is given as a string, ADK builds a new Gemini wrapper
+# (and a new API client with its own HTTP connection pool) for every LLM call.
+# Sharing one instance lets all agents reuse the same client and keep-alive
+# connections on the persistent event loop.
+gemini_flash = Gemini(model="gemini-2.0-flash")
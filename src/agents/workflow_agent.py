@@ -5,6 +5,7 @@ Prevents agent loops and maintains context across agent interactions
 
 from google.adk.agents import Agent
 from google.adk.tools.function_tool import FunctionTool
+from .shared_model import gemini_flash
 from typing import Dict, Any, List, Optional
 import json
 from datetime import datetime
@@ -364,7 +365,7 @@ def finalize_course_creation_workflow(course_id: str) -> Dict[str, Any]:
 # Create the workflow management agent
 workflow_agent = Agent(
     name="workflow_agent",
-    model="gemini-2.0-flash",
+    model=gemini_flash,
     description=(
         "Manages conversation flow, prevents agent loops, and maintains workflow state "
         "across multiple agent interactions"
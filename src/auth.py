@@ -1,20 +1,23 @@
 """
 Authentication module for Flask app
 """
-import json
 from functools import wraps
 from flask import request, jsonify, session
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from models import db, User
+from models import db, User, json_dumps
 
 # Initialize Flask-Login
 login_manager = LoginManager()
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user for Flask-Login"""
+    """Load user for Flask-Login (served from the database's user cache when fresh)"""
     return db.get_user_by_id(user_id)
 
+def invalidate_cached_user(user_id: str):
+    """Drop a user from the user cache after logout or profile changes"""
+    db.invalidate_cached_user(user_id)
+
 @login_manager.unauthorized_handler
 def unauthorized():
     """Handle unauthorized access"""
@@ -44,6 +47,10 @@ def authenticate_user(email: str, password: str):
     """Authenticate user and log them in"""
     user = db.get_user_by_email(email)
     if user and user.check_password(password):
+        # Upgrade legacy SHA-256 hashes to scrypt now that we have the plaintext
+        if user.needs_rehash():
+            user.password_hash = User.hash_password(password)
+            db.update_user_password_hash(user.id, user.password_hash)
         login_user(user)
         # Convert user object to dictionary for JSON serialization
         user_data = user.to_dict()
@@ -62,7 +69,7 @@ def update_user_profile(profile_data: dict):
         return False, "Not authenticated"
     
     try:
-        profile_json = json.dumps(profile_data)
+        profile_json = json_dumps(profile_data)
         success = db.update_user_profile(current_user.id, profile_json)
         if success:
             # Update current user's profile data
@@ -86,7 +93,7 @@ def add_study_session(session_type: str, duration_minutes: int = None,
     if not current_user.is_authenticated:
         return None
     
-    metadata_json = json.dumps(metadata or {})
+    metadata_json = json_dumps(metadata or {})
     return db.add_study_session(
         current_user.id, session_type, duration_minutes, score, metadata_json
     )
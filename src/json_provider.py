@@ -0,0 +1,63 @@
+"""
+JSON provider for Flask app
+Uses orjson to encode API responses when it is installed
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Output matches the default provider:
+    keys are sorted when sort_keys is set, and datetimes are passed through to
+    Flask's default() so they keep the HTTP date format instead of ISO 8601.
+    """
+
+    option = 0
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _option(self, indent: bool, sort_keys: bool) -> int:
+        """orjson options, with pretty printing and key sorting when requested"""
+        option = self.option
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize data as JSON to a string"""
+        option = self._option(bool(kwargs.get('indent')), kwargs.get('sort_keys', self.sort_keys))
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON from a string or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the given arguments as JSON and return a response with the bytes directly"""
+        # Same argument handling as jsonify(): one value, a list of values, or keyword items
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        if not args and not kwargs:
+            obj = None
+        elif len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs
+        
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        option = self._option(indent, self.sort_keys) | orjson.OPT_APPEND_NEWLINE
+        body = orjson.dumps(obj, default=self.default, option=option)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Use orjson for the Flask app's JSON handling if it is installed"""
+    if orjson:
+        app.json = ORJSONProvider(app)
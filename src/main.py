@@ -8,26 +8,33 @@ This integrates the core agentic architecture using Google ADK:
 """
 
 import os
-from flask import Flask, request, jsonify, send_from_directory, abort
+import hashlib
+import logging
+from flask import Flask, Response, request, jsonify, abort, stream_with_context
 from flask_cors import CORS
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
 from flask_login import logout_user, current_user
 from dotenv import load_dotenv
-import json
+import re
 import asyncio
+import threading
+import itertools
 from datetime import datetime
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Simple in-memory storage for recently uploaded file content
-# In production, this should be replaced with proper database storage or Redis
-recent_uploads = {}
-
-# Session management for persistent agent memory
-user_sessions = {}
+# Set LOG_LEVEL=DEBUG to trace agent sessions and events
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
+logger = logging.getLogger(__name__)
 
 # Import Google ADK components
 from google.adk.runners import Runner
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
 from google.adk.sessions import InMemorySessionService
 from google import genai
 
@@ -35,16 +42,46 @@ from google import genai
 from agents.orchestrator_agent import orchestrator_agent
 
 # Import authentication and models
-from auth import init_auth, register_user, authenticate_user, get_current_user_data, update_user_profile, get_user_progress, add_study_session, api_login_required
+from auth import init_auth, register_user, authenticate_user, get_current_user_data, update_user_profile, get_user_progress, add_study_session, api_login_required, invalidate_cached_user
 from models import db
+from json_provider import init_json_provider
+from session_store import SessionStore
+from response_cache import ResponseCache, normalize_text, normalize_items
+from request_schemas import RequestValidationError, FLASHCARDS_REQUEST, EXAM_REQUEST, STUDY_PLAN_REQUEST
+
+# Uploaded file content, shared across workers via Redis when configured
+session_store = SessionStore(os.getenv('REDIS_URL'))
+
+# Generated flashcards, exams and study plans, reused for identical requests
+response_cache = ResponseCache(db)
 
 # Use Flask static_folder to serve built React assets from src/static
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'), static_url_path='/static')
 CORS(app, supports_credentials=True)
 
+# Compress larger JSON/static responses (brotli when the client supports it, else gzip).
+# Streamed responses such as the SSE chat endpoint are left uncompressed so they flush immediately.
+if Compress:
+    app.config.update(
+        COMPRESS_ALGORITHM=['br', 'gzip'],
+        COMPRESS_MIN_SIZE=1024,
+        COMPRESS_LEVEL=1,
+        COMPRESS_BR_LEVEL=4,
+        COMPRESS_STREAMS=False
+    )
+    Compress(app)
+
+# Cap request bodies so large uploads are rejected before they are buffered.
+# Werkzeug spools multipart files above 500KB to disk, so accepted uploads stay out of RAM.
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', '50')) * 1024 * 1024
+MAX_UPLOAD_FILES = int(os.getenv('MAX_UPLOAD_FILES', '20'))
+
 # Initialize authentication
 init_auth(app)
 
+# Encode JSON responses with orjson
+init_json_provider(app)
+
 # Initialize agentic components
 google_api_key = os.getenv('GOOGLE_API_KEY')
 firecrawl_api_key = os.getenv('FIRECRAWL_API_KEY')
@@ -75,70 +112,114 @@ if google_api_key:
 else:
     print("⚠️ ADK Runner not available - missing API key")
 
-async def run_agent_query(user_input: str, user_id: str = "anonymous") -> str:
-    """Helper function to run agent queries using ADK Runner with persistent sessions"""
-    if not adk_runner or not session_service:
-        raise Exception("ADK Runner or SessionService not available")
-    
-    user_content = genai.types.Content(
-        role='user', 
-        parts=[genai.types.Part(text=user_input)]
-    )
+# Long-lived event loop for agent calls. Reusing one loop keeps the runner's
+# HTTP clients and session service alive across requests instead of tearing
+# them down with a fresh asyncio.run() on every call.
+agent_loop = asyncio.new_event_loop()
+threading.Thread(target=agent_loop.run_forever, name='agent-event-loop', daemon=True).start()
+
+# ADK session id per user. Sessions live in this worker's InMemorySessionService, so their
+# ids stay process-local too; the Redis-backed session store only covers uploads.
+agent_session_ids = {}
+
+# Session ids already verified in this worker, so repeat turns skip the session lookup
+# (the runner fetches the session itself, so checking it here would fetch it twice)
+user_sessions = {}
+
+async def get_agent_session_id(user_id: str) -> str:
+    """Get the id of the user's existing ADK session or create a new one"""
+    session_id = user_sessions.get(str(user_id))
+    if session_id:
+        return session_id
     
     app_name = "Study Buddy"
     
     try:
-        print(f"Creating session for user {user_id}")
-        session = await session_service.create_session(
-            app_name=app_name,
-            user_id=str(user_id),
-            state={}  # Initialize with empty state
-        )
+        # Reuse the user's existing session so agent memory carries across turns
+        session = None
+        session_id = agent_session_ids.get(str(user_id))
+        if session_id:
+            session = await session_service.get_session(
+                app_name=app_name,
+                user_id=str(user_id),
+                session_id=session_id
+            )
         
-        if not session or not hasattr(session, 'id'):
-            raise Exception("Session creation failed - invalid session object returned")
+        if not session:
+            logger.debug("Creating session for user %s", user_id)
+            session = await session_service.create_session(
+                app_name=app_name,
+                user_id=str(user_id),
+                state={}  # Initialize with empty state
+            )
+            
+            if not session or not hasattr(session, 'id'):
+                raise Exception("Session creation failed - invalid session object returned")
+            
+            agent_session_ids[str(user_id)] = session.id
         
-        print(f"✅ Session ready with ID: {session.id}")
+        logger.debug("Session ready with ID: %s", session.id)
         
     except Exception as session_error:
-        print(f"❌ Session creation failed: {session_error}")
+        logger.error("Session creation failed: %s", session_error)
         raise Exception(f"Failed to create session: {session_error}")
     
+    user_sessions[str(user_id)] = session.id
+    return session.id
+
+def forget_agent_session(user_id: str):
+    """Drop the cached session id so the next turn looks the session up again"""
+    user_sessions.pop(str(user_id), None)
+
+async def run_agent_query(user_input: str, user_id: str = "anonymous", session_id: str = None) -> str:
+    """Helper function to run agent queries using ADK Runner with persistent sessions"""
+    if not adk_runner or not session_service:
+        raise Exception("ADK Runner or SessionService not available")
+    
+    user_content = genai.types.Content(
+        role='user', 
+        parts=[genai.types.Part(text=user_input)]
+    )
+    
+    if session_id is None:
+        session_id = await get_agent_session_id(user_id)
+    
     # Now run the agent with the valid session
     final_response = None
     event_count = 0
     try:
-        print(f"🤖 Running ADK agent for user {user_id}, session {session.id}")
+        logger.debug("Running ADK agent for user %s, session %s", user_id, session_id)
         async for event in adk_runner.run_async(
             user_id=str(user_id), 
-            session_id=session.id,
+            session_id=session_id,
             new_message=user_content
         ):
             event_count += 1
-            print(f"📤 Event {event_count}: {type(event).__name__}, is_final: {event.is_final_response()}")
+            logger.debug("Event %d: %s, is_final: %s", event_count, type(event).__name__, event.is_final_response())
             
             if event.is_final_response():
-                print(f"📋 Final response event: {event}")
+                logger.debug("Final response event: %s", event)
                 if event.content and hasattr(event.content, 'parts') and event.content.parts:
                     final_response = event.content.parts[0].text
-                    print(f"✅ Extracted response text: {final_response[:100]}...")
+                    logger.debug("Extracted response text: %.100s...", final_response)
                     break
                 else:
-                    print(f"⚠️ Received final response event with empty content")
+                    logger.warning("Received final response event with empty content")
                     if hasattr(event, 'text'):
                         final_response = event.text
-                        print(f"✅ Using event.text: {final_response[:100]}...")
+                        logger.debug("Using event.text: %.100s...", final_response)
                         break
                     elif hasattr(event, 'content') and event.content:
                         final_response = str(event.content)
-                        print(f"✅ Using str(event.content): {final_response[:100]}...")
+                        logger.debug("Using str(event.content): %.100s...", final_response)
                         break
                     else:
-                        print(f"❌ No usable content found in event")
+                        logger.warning("No usable content found in event")
         
-        print(f"📊 Processed {event_count} events total")
+        logger.debug("Processed %d events total", event_count)
     except Exception as runner_error:
-        print(f"❌ ADK Runner execution failed: {runner_error}")
+        logger.error("ADK Runner execution failed: %s", runner_error)
+        forget_agent_session(user_id)
         raise Exception(f"Agent execution failed: {runner_error}")
     
     if not final_response:
@@ -146,6 +227,236 @@ async def run_agent_query(user_input: str, user_id: str = "anonymous") -> str:
     
     return final_response
 
+def run_agent_sync(user_input: str, user_id: str = "anonymous") -> str:
+    """Submit an agent query to the shared event loop and wait for the result"""
+    future = asyncio.run_coroutine_threadsafe(run_agent_query(user_input, user_id), agent_loop)
+    return future.result()
+
+async def run_agent_query_detached(user_input: str, user_id: str = "anonymous") -> str:
+    """Run an agent query in a throwaway session so it can run alongside others for the same user"""
+    session = await session_service.create_session(app_name="Study Buddy", user_id=str(user_id), state={})
+    try:
+        return await run_agent_query(user_input, user_id, session_id=session.id)
+    finally:
+        await session_service.delete_session(app_name="Study Buddy", user_id=str(user_id), session_id=session.id)
+
+def run_agent_detached_sync(user_input: str, user_id: str = "anonymous") -> str:
+    """Run an agent query in a throwaway session, leaving the user's chat session untouched"""
+    future = asyncio.run_coroutine_threadsafe(run_agent_query_detached(user_input, user_id), agent_loop)
+    return future.result()
+
+def run_agent_parallel(prompts: list, user_id: str = "anonymous") -> list:
+    """Run independent agent queries concurrently on the shared event loop, in prompt order"""
+    async def gather_queries():
+        return await asyncio.gather(*(run_agent_query_detached(prompt, user_id) for prompt in prompts))
+    return asyncio.run_coroutine_threadsafe(gather_queries(), agent_loop).result()
+
+def run_agent_cached(cache_key: tuple, generate, *args) -> str:
+    """
+    Call generate(*args), reusing a cached response for the same request unless ?nocache=1.
+    The agents can read the user's courses through their tools, so keys must include the user id.
+    """
+    use_cache = request.args.get('nocache') != '1'
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Response cache hit for %s", cache_key[0])
+            return cached
+    
+    response_text = generate(*args)
+    response_cache.set(cache_key, response_text)
+    return response_text
+
+async def stream_agent_query(user_input: str, user_id: str = "anonymous"):
+    """Run an agent query and yield response text as partial events arrive"""
+    if not adk_runner or not session_service:
+        raise Exception("ADK Runner or SessionService not available")
+    
+    user_content = genai.types.Content(
+        role='user', 
+        parts=[genai.types.Part(text=user_input)]
+    )
+    
+    session_id = await get_agent_session_id(user_id)
+    
+    # SSE streaming mode makes the runner emit partial text events before the final one
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+    streamed_partial = False
+    try:
+        async for event in adk_runner.run_async(
+            user_id=str(user_id), 
+            session_id=session_id,
+            new_message=user_content,
+            run_config=run_config
+        ):
+            if not event.content or not event.content.parts:
+                continue
+            text = ''.join(part.text for part in event.content.parts if getattr(part, 'text', None))
+            if not text:
+                continue
+            
+            if event.partial:
+                streamed_partial = True
+                yield text
+            elif event.is_final_response():
+                # The final event repeats the aggregated text; only send it if nothing was streamed
+                if not streamed_partial:
+                    yield text
+                break
+    except Exception:
+        forget_agent_session(user_id)
+        raise
+
+def iterate_agent_stream(user_input: str, user_id: str = "anonymous"):
+    """Drive stream_agent_query on the shared event loop from a synchronous generator"""
+    agent_stream = stream_agent_query(user_input, user_id)
+    try:
+        while True:
+            future = asyncio.run_coroutine_threadsafe(agent_stream.__anext__(), agent_loop)
+            try:
+                yield future.result()
+            except StopAsyncIteration:
+                break
+    finally:
+        # Close the async generator on the agent loop too when the client disconnects,
+        # so the runner's run_async generator does not stay suspended there
+        asyncio.run_coroutine_threadsafe(agent_stream.aclose(), agent_loop).result()
+
+# Monotonic per-process ids for chat intent analysis
+intent_counter = itertools.count()
+
+# Messages that should get uploaded file content as context.
+# Substring matches (no word boundaries) to keep "courses", "created", etc. triggering.
+COURSE_REQUEST_PATTERN = re.compile(r'study plan|create|course|database|comp 353|syllabus|outline', re.IGNORECASE)
+FILE_REQUEST_PATTERN = re.compile(r'file', re.IGNORECASE)
+
+# Fixed instructions for the generation endpoints. They come first in each prompt and the
+# request-specific data follows, so consecutive prompts share a byte-identical prefix that
+# the model provider can cache.
+FLASHCARDS_INSTRUCTIONS = """Generate flashcards from the content below.
+Write one card per key term, definition, fact or concept, with a short question on the front
+and a concise answer on the back. Cover the whole content and avoid duplicate cards."""
+
+EXAM_INSTRUCTIONS = """Generate practice exam questions for the topics below at the given difficulty.
+Mix multiple choice, short answer and problem-solving questions, cover every topic,
+and include the answer and a brief explanation for each question."""
+
+STUDY_PLAN_INSTRUCTIONS = """Create a study plan for the subjects below over the given timeframe.
+Break the timeframe into study sessions, say which topics each session covers and how long
+it should take, and leave time for review before the end."""
+
+SESSION_COMPLETION_INSTRUCTIONS = """I just completed a study session. Please:
+1. Mark this session as completed
+2. Update my progress
+3. Give me feedback on my performance
+4. Suggest what to focus on in the next session
+5. Generate validation questions to test my understanding"""
+
+COURSE_CREATION_INSTRUCTIONS = """Please help me create a new course with the details below. I need you to:
+1. Analyze the course content and structure
+2. Create a course in the system
+3. Ask me any questions needed for creating a study plan
+4. Guide me through the next steps"""
+
+MATERIAL_UPLOAD_INSTRUCTIONS = """I'm uploading new course material for my course. Please:
+1. Analyze this content and add it to my course
+2. Update my study plan if needed
+3. Let me know what study sessions this affects
+4. Provide any recommendations for studying this material"""
+
+def build_prompt(instructions: str, **fields) -> str:
+    """Put the fixed instructions first and the request-specific fields after them"""
+    details = '\n'.join(f"{name}: {value}" for name, value in fields.items())
+    return f"{instructions}\n\n---\n{details}"
+
+# Exams with at least this many topics get one agent query per topic, run concurrently
+EXAM_PARALLEL_MIN_TOPICS = 3
+
+def generate_exam_text(topics: list, difficulty: str, user_id: str) -> str:
+    """Generate an exam, fanning out one query per topic for larger topic lists"""
+    if len(topics) < EXAM_PARALLEL_MIN_TOPICS:
+        exam_prompt = build_prompt(EXAM_INSTRUCTIONS, Topics=', '.join(topics), Difficulty=difficulty)
+        return run_agent_detached_sync(exam_prompt, user_id)
+    
+    topic_prompts = [build_prompt(EXAM_INSTRUCTIONS, Topics=topic, Difficulty=difficulty) for topic in topics]
+    sections = run_agent_parallel(topic_prompts, user_id)
+    return '\n\n'.join(f"## {topic}\n\n{section}" for topic, section in zip(topics, sections))
+
+def format_file_context(processed_content: list) -> str:
+    """Format uploaded file content into a single prompt block, truncating long files"""
+    return ''.join(
+        f"\nFile: {file_info['filename']}\n"
+        f"Content: {file_info['content'][:4000]}{'...' if len(file_info['content']) > 4000 else ''}\n"
+        for file_info in processed_content
+    )
+
+async def add_uploads_to_agent_session(user_id: str, processed_content: list) -> str:
+    """Append uploaded file content to the user's ADK session once and return the session id"""
+    session_id = await get_agent_session_id(user_id)
+    session = await session_service.get_session(
+        app_name="Study Buddy",
+        user_id=str(user_id),
+        session_id=session_id
+    )
+    
+    file_context = f"""
+UPLOADED FILE CONTENT:
+{format_file_context(processed_content)}
+
+Use this uploaded content whenever I ask about my files, courses or study plans. The files were already processed and contain the course information.
+"""
+    event = Event(
+        author='user',
+        content=genai.types.Content(role='user', parts=[genai.types.Part(text=file_context)])
+    )
+    await session_service.append_event(session, event)
+    return session_id
+
+def build_enhanced_input(user_input: str, user_key: str, user_id: str) -> str:
+    """Add previously uploaded file content to the user's message when relevant"""
+    # Always check for uploaded files and include them in context
+    upload_data = session_store.get_uploads(user_key)
+    if not upload_data or not upload_data['content']:
+        return user_input
+    
+    # Skip re-sending the files only when they sit in a session this worker holds; after a
+    # restart or on another worker the stored id names a session that no longer exists here
+    agent_session_id = upload_data.get('agent_session_id')
+    if agent_session_id and agent_session_id == user_sessions.get(str(user_id)):
+        return user_input
+    
+    # Include file content for study plan requests or course-related queries
+    if COURSE_REQUEST_PATTERN.search(user_input):
+        logger.debug("Including file content context for course-related request")
+        return f"""
+{user_input}
+
+CONTEXT - PREVIOUSLY UPLOADED FILE CONTENT:
+{format_file_context(upload_data['content'])}
+
+Please use this uploaded content to fulfill the user's request. The file was already processed and contains the course information.
+"""
+    
+    # Also include for file-related queries
+    if FILE_REQUEST_PATTERN.search(user_input):
+        logger.debug("Including content from %d uploaded file(s)", len(upload_data['content']))
+        return f"""
+{user_input}
+
+UPLOADED FILE CONTENT:
+{format_file_context(upload_data['content'])}
+
+Please process this content for the user's request.
+"""
+    
+    return user_input
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Return a JSON error when an upload exceeds MAX_CONTENT_LENGTH"""
+    max_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({'error': f'Upload too large. Maximum request size is {max_mb}MB'}), 413
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -156,7 +467,8 @@ def health_check():
         'user_authenticated': current_user.is_authenticated if current_user else False,
         'components': {
             'adk_runner': adk_runner is not None,
-            'session_service': session_service is not None
+            'session_service': session_service is not None,
+            'session_store': session_store.backend
         },
         'agents': {
             'orchestrator': 'ADK Runner' if adk_runner else None,
@@ -217,6 +529,7 @@ def auth_login():
 def auth_logout():
     """User logout endpoint"""
     try:
+        invalidate_cached_user(current_user.id)
         logout_user()
         return jsonify({'message': 'Logged out successfully'}), 200
     except Exception as e:
@@ -271,7 +584,6 @@ def update_profile():
 @app.route('/api/chat/orchestrator', methods=['POST'])
 @api_login_required
 def chat():
->>>>>>> 7b0e4d1fbe0a6fa01447a654691ee9c8c3ffaca3
     """
     Enhanced chat endpoint using Google ADK orchestrator
     
@@ -291,86 +603,22 @@ def chat():
         if not adk_runner:
             return jsonify({'error': 'ADK Runner not configured. Please check API keys.'}), 500
         
-        print(f"🎯 Processing user input: {user_input[:100]}...")
-        print(f"🤖 Using ADK Runner with orchestrator agent...")
+        logger.debug("Processing user input: %.100s...", user_input)
         
-        # Check if user mentions uploaded files and include the content
-        # Also check for study plan requests and course-related queries
-        enhanced_input = user_input
         user_key = str(current_user.id) if current_user.is_authenticated else 'anonymous'
-        
-<<<<<<< HEAD
-        # Step 3: Plan sub-tasks
-        plan = planner.create_plan(user_input, context)
-        optimized_plan = planner.optimize_plan(plan)
-
-        # Step 4: Execute tasks
-        if optimized_plan:
-            execution_results = executor.execute_plan(optimized_plan, context)
-            # Step 5: Generate final response
-            final_response = executor.synthesize_results(execution_results, user_input)
-        else:
-            # If no plan is needed, generate a direct response
-            final_response = executor.synthesize_results([], user_input)
-
-        # Step 6: Store the full interaction in memory
-        memory.store_interaction(user_input, final_response, optimized_plan, execution_results if optimized_plan else [])
-
-        return jsonify({'response': final_response})
-
-    except Exception as e:
-        app.logger.error(f"Error in agentic workflow: {e}", exc_info=True)
-        return jsonify({'error': 'An internal error occurred.'}), 500
-=======
-        # Always check for uploaded files and include them in context
-        if user_key in recent_uploads:
-            upload_data = recent_uploads[user_key]
-            file_contents = []
-            for file_info in upload_data['content']:
-                file_contents.append(f"""
-File: {file_info['filename']}
-Content: {file_info['content'][:4000]}{'...' if len(file_info['content']) > 4000 else ''}
-""")
-            
-            if file_contents:
-                # Include file content for study plan requests or course-related queries
-                if any(keyword in user_input.lower() for keyword in ['study plan', 'create', 'course', 'database', 'comp 353', 'syllabus', 'outline']):
-                    enhanced_input = f"""
-{user_input}
-
-CONTEXT - PREVIOUSLY UPLOADED FILE CONTENT:
-{''.join(file_contents)}
-
-Please use this uploaded content to fulfill the user's request. The file was already processed and contains the course information.
-"""
-                    print(f"📄 Including file content context for course-related request")
-                # Also include for file-related queries
-                elif "Files uploaded:" in user_input or "file" in user_input.lower():
-                    enhanced_input = f"""
-{user_input}
-
-UPLOADED FILE CONTENT:
-{''.join(file_contents)}
-
-Please process this content for the user's request.
-"""
-                    print(f"📄 Including content from {len(file_contents)} uploaded file(s)")
+        enhanced_input = build_enhanced_input(user_input, user_key, str(user_id))
         
         try:
-            # Use ADK Runner to process the message
-            async def run_agent():
-                return await run_agent_query(enhanced_input, str(user_id))
-            
-            # Run the async agent function
-            response_text = asyncio.run(run_agent())
+            # Use ADK Runner to process the message on the shared event loop
+            response_text = run_agent_sync(enhanced_input, str(user_id))
             
             if not response_text:
                 raise Exception("No response received from agent")
                 
-            print("✅ ADK Runner succeeded")
+            logger.debug("ADK Runner succeeded")
                 
         except Exception as adk_error:
-            print(f"⚠️ ADK Runner failed: {adk_error}")
+            logger.warning("ADK Runner failed: %s", adk_error)
             return jsonify({
                 'error': f'Agent execution failed: {str(adk_error)}',
                 'fallback_response': f"I understand you're asking about: {user_input}. I'm here to help with your educational needs!",
@@ -386,7 +634,7 @@ Please process this content for the user's request.
             'model_used': 'gemini-2.0-flash',
             'processing_method': 'google_adk_runner',
             'intent_analysis': {
-                'id': f'intent_{datetime.now().timestamp()}',
+                'id': f'intent_{next(intent_counter):x}',
                 'description': f'Process educational query: {user_input[:50]}...',
                 'tool': 'orchestrator_agent'
             },
@@ -396,9 +644,52 @@ Please process this content for the user's request.
         })
         
     except Exception as e:
-        print(f"❌ Error in chat endpoint: {str(e)}")
+        logger.error("Error in chat endpoint: %s", e)
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/api/chat/stream', methods=['POST'])
+@api_login_required
+def chat_stream():
+    """
+    Streaming chat endpoint using Google ADK orchestrator
+    
+    Sends the agent response as Server-Sent Events while it is generated:
+    - data: {"delta": "..."} for each chunk of response text
+    - event: done once the response is complete
+    - event: error if the agent fails mid-stream
+    """
+    try:
+        data = request.get_json()
+        user_input = data.get('message', '').strip()
+        user_id = data.get('user_id', current_user.id if current_user.is_authenticated else 'anonymous')
+        
+        if not user_input:
+            return jsonify({'error': 'Message is required'}), 400
+        
+        if not adk_runner:
+            return jsonify({'error': 'ADK Runner not configured. Please check API keys.'}), 500
+        
+        user_key = str(current_user.id) if current_user.is_authenticated else 'anonymous'
+        enhanced_input = build_enhanced_input(user_input, user_key, str(user_id))
+        
+        def generate():
+            try:
+                for delta in iterate_agent_stream(enhanced_input, str(user_id)):
+                    yield f"data: {app.json.dumps({'delta': delta})}\n\n"
+                yield "event: done\ndata: {}\n\n"
+            except Exception as stream_error:
+                logger.warning("ADK Runner stream failed: %s", stream_error)
+                yield f"event: error\ndata: {app.json.dumps({'error': f'Agent execution failed: {str(stream_error)}'})}\n\n"
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        
+    except Exception as e:
+        logger.error("Error in chat stream endpoint: %s", e)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
->>>>>>> 7b0e4d1fbe0a6fa01447a654691ee9c8c3ffaca3
 
 # Learning Progress endpoints
 @app.route('/api/progress', methods=['GET'])
@@ -414,11 +705,11 @@ def get_progress():
         progress_data = db.get_user_progress(user_id)
         
         # Get course-specific progress
-        courses = db.get_user_courses(user_id)
+        courses = db.get_user_courses_with_progress(user_id)
         course_progress = []
-        for course in courses:
-            course_prog = db.get_course_progress(course.id)
-            course_prog['course_title'] = course.title
+        for course_data in courses:
+            course_prog = course_data['progress']
+            course_prog['course_title'] = course_data['title']
             course_progress.append(course_prog)
         
         progress_data['course_progress'] = course_progress
@@ -436,8 +727,8 @@ def get_chat_memory():
         
         # Check for uploaded files (this is our main persistence mechanism)
         file_info = {}
-        if user_key in recent_uploads:
-            upload_data = recent_uploads[user_key]
+        upload_data = session_store.get_uploads(user_key)
+        if upload_data:
             file_info['has_uploaded_files'] = True
             file_info['file_count'] = len(upload_data['content'])
             file_info['files'] = [f['filename'] for f in upload_data['content']]
@@ -462,8 +753,7 @@ def clear_session():
         user_key = str(current_user.id) if current_user.is_authenticated else 'anonymous'
             
         # Clear uploaded files  
-        if user_key in recent_uploads:
-            del recent_uploads[user_key]
+        session_store.clear_uploads(user_key)
             
         return jsonify({
             'message': 'Uploaded files cleared successfully',
@@ -533,6 +823,10 @@ def upload_course():
 @api_login_required
 def upload_chat_documents():
     """Upload documents for chat analysis"""
+    # Reject oversized bodies from the Content-Length header before the multipart body is parsed
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return request_too_large(None)
+    
     try:
         if 'files' not in request.files:
             return jsonify({'error': 'No files provided'}), 400
@@ -541,52 +835,57 @@ def upload_chat_documents():
         if not files or all(file.filename == '' for file in files):
             return jsonify({'error': 'No files selected'}), 400
         
+        if len(files) > MAX_UPLOAD_FILES:
+            return jsonify({'error': f'Too many files. Maximum is {MAX_UPLOAD_FILES} files per upload'}), 413
+        
         # Import file processing tools
-        from tools.file_ingestion_tools import process_uploaded_file
-        import tempfile
+        from tools.file_ingestion_tools import process_uploaded_stream
+        
+        # Werkzeug already holds each upload in memory (or spooled to disk when large),
+        # so extract straight from the upload streams instead of copying to temp files
+        selected_files = []
+        for file in files:
+            if file.filename and file.filename != '':
+                file.stream.seek(0, os.SEEK_END)
+                file_size = file.stream.tell()
+                file.stream.seek(0)
+                selected_files.append((file, file_size))
+        
+        # Files are independent, so extract them in parallel worker threads
+        async def process_all():
+            return await asyncio.gather(*[
+                asyncio.to_thread(process_uploaded_stream, file.stream, file.filename)
+                for file, _ in selected_files
+            ])
+        
+        results = asyncio.run_coroutine_threadsafe(process_all(), agent_loop).result()
         
         uploaded_files = []
         processed_content = []
         
-        for file in files:
-            if file.filename and file.filename != '':
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-                    file.save(temp_file.name)
-                    
-                    # Process the file
-                    result = process_uploaded_file(temp_file.name, file.filename)
-                    
-                    if result.get("status") == "success":
-                        uploaded_files.append({
-                            'filename': file.filename,
-                            'size': len(file.read()),
-                            'type': file.content_type,
-                            'word_count': result.get('word_count', 0),
-                            'content_type': result.get('content_type', 'unknown')
-                        })
-                        
-                        # Store the extracted content for agent use
-                        processed_content.append({
-                            'filename': file.filename,
-                            'content': result.get('content', ''),
-                            'metadata': result.get('metadata', {}),
-                            'processed_at': result.get('processed_at')
-                        })
-                    else:
-                        uploaded_files.append({
-                            'filename': file.filename,
-                            'error': result.get('error', 'Processing failed'),
-                            'type': file.content_type
-                        })
-                    
-                    # Clean up temp file
-                    try:
-                        os.unlink(temp_file.name)
-                    except:
-                        pass
-                    
-                    file.seek(0)  # Reset file pointer
+        for (file, file_size), result in zip(selected_files, results):
+            if result.get("status") == "success":
+                uploaded_files.append({
+                    'filename': file.filename,
+                    'size': file_size,
+                    'type': file.content_type,
+                    'word_count': result.get('word_count', 0),
+                    'content_type': result.get('content_type', 'unknown')
+                })
+                
+                # Store the extracted content for agent use
+                processed_content.append({
+                    'filename': file.filename,
+                    'content': result.get('content', ''),
+                    'metadata': result.get('metadata', {}),
+                    'processed_at': result.get('processed_at')
+                })
+            else:
+                uploaded_files.append({
+                    'filename': file.filename,
+                    'error': result.get('error', 'Processing failed'),
+                    'type': file.content_type
+                })
         
         # Store processed content in session or database for agent access
         # For now, we'll store it in a simple way - in production, use proper storage
@@ -595,12 +894,24 @@ def upload_chat_documents():
             'upload_timestamp': datetime.now().isoformat()
         }
         
-        # Store in our in-memory cache for agent access
         user_key = str(current_user.id) if current_user.is_authenticated else 'anonymous'
-        recent_uploads[user_key] = {
+        
+        # Add the files to the agent session once so later chat turns don't resend them
+        agent_session_id = None
+        if adk_runner and processed_content:
+            try:
+                agent_session_id = asyncio.run_coroutine_threadsafe(
+                    add_uploads_to_agent_session(user_key, processed_content), agent_loop
+                ).result()
+            except Exception as session_error:
+                logger.warning("Could not add uploads to agent session: %s", session_error)
+        
+        # Store in the session store for agent access
+        session_store.set_uploads(user_key, {
             'content': processed_content,
-            'timestamp': datetime.now().isoformat()
-        }
+            'timestamp': datetime.now().isoformat(),
+            'agent_session_id': agent_session_id
+        })
         
         return jsonify({
             'message': f'Successfully processed {len([f for f in uploaded_files if "error" not in f])} file(s)',
@@ -632,23 +943,18 @@ def create_course():
         # Use the agent to help create and analyze the course
         user_id = current_user.id if current_user.is_authenticated else 'anonymous'
         
-        course_prompt = f"""
-        Please help me create a new course with the following details:
-        Title: {course_title}
-        Description: {course_description}
-        Course Outline: {course_outline}
-        
-        I need you to:
-        1. Analyze the course content and structure
-        2. Create a course in the system
-        3. Ask me any questions needed for creating a study plan
-        4. Guide me through the next steps
-        
-        My user ID is: {user_id}
-        """
+        course_prompt = build_prompt(
+            COURSE_CREATION_INSTRUCTIONS,
+            **{
+                'My user ID is': user_id,
+                'Title': course_title,
+                'Description': course_description,
+                'Course Outline': course_outline
+            }
+        )
         
         try:
-            response_text = asyncio.run(run_agent_query(course_prompt, str(user_id)))
+            response_text = run_agent_sync(course_prompt, str(user_id))
             
             return jsonify({
                 'response': response_text,
@@ -678,13 +984,8 @@ def get_courses():
         if not user_id:
             return jsonify({'error': 'User not authenticated'}), 401
         
-        courses = db.get_user_courses(user_id)
-        courses_data = [course.to_dict() for course in courses]
-        
-        # Get progress for each course
-        for course_data in courses_data:
-            progress = db.get_course_progress(course_data['id'])
-            course_data['progress'] = progress
+        # Courses and their progress come back from a single query
+        courses_data = db.get_user_courses_with_progress(user_id)
         
         return jsonify({
             'courses': courses_data,
@@ -707,14 +1008,14 @@ def get_course_details(course_id):
         if course.user_id != current_user.id:
             return jsonify({'error': 'Access denied'}), 403
         
-        # Get course materials
-        materials = db.get_course_materials(course_id)
+        # Get course materials; the listing leaves out the full text
+        materials = db.get_course_materials(course_id, include_content=False)
         
         # Get study plan if exists
         study_plan = db.get_course_study_plan(course_id)
         study_sessions = []
         if study_plan:
-            study_sessions = [session.to_dict() for session in db.get_study_sessions(study_plan.id)]
+            study_sessions = db.get_study_sessions_data(study_plan.id)
         
         # Get progress
         progress = db.get_course_progress(course_id)
@@ -754,29 +1055,27 @@ def upload_course_material(course_id):
         # Use agent to analyze and process the content
         user_id = current_user.id if current_user.is_authenticated else 'anonymous'
         
-        upload_prompt = f"""
-        I'm uploading new course material for my course:
-        Course ID: {course_id}
-        Material Title: {material_title}
-        Week Number: {week_number}
-        Content Type: {content_type}
-        Content: {content_text[:500]}...
-        
-        Please:
-        1. Analyze this content and add it to my course
-        2. Update my study plan if needed
-        3. Let me know what study sessions this affects
-        4. Provide any recommendations for studying this material
-        """
+        upload_prompt = build_prompt(
+            MATERIAL_UPLOAD_INSTRUCTIONS,
+            **{
+                'Course ID': course_id,
+                'Material Title': material_title,
+                'Week Number': week_number,
+                'Content Type': content_type,
+                'Content': f"{content_text[:500]}..."
+            }
+        )
         
         try:
-            response_text = asyncio.run(run_agent_query(upload_prompt, str(user_id)))
+            response_text = run_agent_sync(upload_prompt, str(user_id))
             
-            # Also add to database directly
+            # Also add to database directly, from this thread rather than the agent loop
             material_id = db.add_course_material(
                 course_id, user_id, material_title, content_type,
                 content_text, None, week_number, []
             )
+            if material_id is None:
+                return jsonify({'error': 'Material upload failed: could not store the material'}), 500
             
             return jsonify({
                 'material_id': material_id,
@@ -805,23 +1104,18 @@ def complete_study_session(plan_id, session_id):
         # Use agent to handle session completion
         user_id = current_user.id if current_user.is_authenticated else 'anonymous'
         
-        completion_prompt = f"""
-        I just completed a study session:
-        Session ID: {session_id}
-        Study Plan ID: {plan_id}
-        Validation Score: {validation_score}
-        Notes: {notes}
-        
-        Please:
-        1. Mark this session as completed
-        2. Update my progress
-        3. Give me feedback on my performance
-        4. Suggest what to focus on in the next session
-        5. Generate validation questions to test my understanding
-        """
+        completion_prompt = build_prompt(
+            SESSION_COMPLETION_INSTRUCTIONS,
+            **{
+                'Session ID': session_id,
+                'Study Plan ID': plan_id,
+                'Validation Score': validation_score,
+                'Notes': notes
+            }
+        )
         
         try:
-            response_text = asyncio.run(run_agent_query(completion_prompt, str(user_id)))
+            response_text = run_agent_sync(completion_prompt, str(user_id))
             
             # Update in database
             success = db.complete_study_session(session_id, validation_score, notes)
@@ -850,8 +1144,11 @@ def complete_study_session(plan_id, session_id):
 def generate_flashcards():
     """Generate flashcards from course content"""
     try:
-        data = request.get_json()
-        content = data.get('content', '').strip()
+        try:
+            req = FLASHCARDS_REQUEST.decode(request.get_data())
+        except RequestValidationError as e:
+            return jsonify({'error': str(e)}), 400
+        content = req.content.strip()
         
         if not content:
             return jsonify({'error': 'Content is required'}), 400
@@ -860,11 +1157,14 @@ def generate_flashcards():
             return jsonify({'error': 'ADK Runner not configured'}), 500
         
         # Use ADK Runner to generate flashcards
-        flashcards_prompt = f"Generate flashcards from this content: {content}"
+        flashcards_prompt = build_prompt(FLASHCARDS_INSTRUCTIONS, Content=content)
         user_id = current_user.id if current_user.is_authenticated else 'anonymous'
         
         try:
-            response_text = asyncio.run(run_agent_query(flashcards_prompt, str(user_id)))
+            response_text = run_agent_cached(
+                ('flashcards', str(user_id), normalize_text(content)),
+                run_agent_detached_sync, flashcards_prompt, str(user_id)
+            )
                 
         except Exception as e:
             return jsonify({
@@ -886,9 +1186,18 @@ def generate_flashcards():
 def generate_exam():
     """Generate practice exam questions"""
     try:
-        data = request.get_json()
-        topics = data.get('topics', [])
-        difficulty = data.get('difficulty', 'medium')
+        try:
+            req = EXAM_REQUEST.decode(request.get_data())
+        except RequestValidationError as e:
+            return jsonify({'error': str(e)}), 400
+        difficulty = req.difficulty
+        
+        # Drop repeated topics, keeping the first spelling, so each gets one exam section.
+        # Sections follow topic order, so the cache key keeps the order too.
+        unique_topics = {}
+        for topic in req.topics:
+            unique_topics.setdefault(normalize_text(topic), topic)
+        topics = list(unique_topics.values())
         
         if not topics:
             return jsonify({'error': 'Topics are required'}), 400
@@ -897,11 +1206,13 @@ def generate_exam():
             return jsonify({'error': 'ADK Runner not configured'}), 500
         
         # Use ADK Runner to generate exam
-        exam_prompt = f"Generate practice exam questions for topics: {', '.join(topics)} at {difficulty} difficulty"
         user_id = current_user.id if current_user.is_authenticated else 'anonymous'
         
         try:
-            response_text = asyncio.run(run_agent_query(exam_prompt, str(user_id)))
+            response_text = run_agent_cached(
+                ('exam', str(user_id), tuple(unique_topics), normalize_text(difficulty)),
+                generate_exam_text, topics, difficulty, str(user_id)
+            )
                 
         except Exception as e:
             return jsonify({
@@ -923,9 +1234,12 @@ def generate_exam():
 def generate_study_plan():
     """Generate personalized study plan"""
     try:
-        data = request.get_json()
-        subjects = data.get('subjects', [])
-        timeframe = data.get('timeframe', '1 week')
+        try:
+            req = STUDY_PLAN_REQUEST.decode(request.get_data())
+        except RequestValidationError as e:
+            return jsonify({'error': str(e)}), 400
+        subjects = req.subjects
+        timeframe = req.timeframe
         
         if not subjects:
             return jsonify({'error': 'Subjects are required'}), 400
@@ -934,11 +1248,14 @@ def generate_study_plan():
             return jsonify({'error': 'ADK Runner not configured'}), 500
         
         # Use ADK Runner to generate study plan
-        plan_prompt = f"Create a study plan for subjects: {', '.join(subjects)} over {timeframe}"
+        plan_prompt = build_prompt(STUDY_PLAN_INSTRUCTIONS, Subjects=', '.join(subjects), Timeframe=timeframe)
         user_id = current_user.id if current_user.is_authenticated else 'anonymous'
         
         try:
-            response_text = asyncio.run(run_agent_query(plan_prompt, str(user_id)))
+            response_text = run_agent_cached(
+                ('study_plan', str(user_id), normalize_items(subjects), normalize_text(timeframe)),
+                run_agent_detached_sync, plan_prompt, str(user_id)
+            )
                 
         except Exception as e:
             return jsonify({
@@ -954,33 +1271,62 @@ def generate_study_plan():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Serve React frontend
-@app.route('/')
-def serve_react_app():
-    """Serve the React frontend"""
+# Built React entry page, read once at startup. The SPA routes all return it,
+# so it is served from memory with a precomputed ETag instead of re-reading the file.
+def load_index_html():
+    """Read the built index.html and its ETag, or (None, None) if the frontend isn't built"""
     try:
-        return send_from_directory(app.static_folder, 'index.html')
+        with open(os.path.join(app.static_folder, 'index.html'), 'rb') as f:
+            body = f.read()
     except FileNotFoundError:
-        return jsonify({
-            'message': 'Frontend not built yet. Please run the frontend separately.',
-            'backend_status': 'running',
-            'api_endpoints': [
-                '/api/health',
-                '/api/auth/register',
-                '/api/auth/login',
-                '/api/chat'
-            ]
-        }), 200
+        return None, None
+    return body, hashlib.md5(body, usedforsecurity=False).hexdigest()
 
-@app.route('/<path:path>')
-def serve_react_routes(path):
-    """Serve React routes"""
-    try:
-        if path.startswith('api/'):
-            abort(404)
-        return send_from_directory(app.static_folder, 'index.html')
-    except FileNotFoundError:
-        return jsonify({'error': 'Frontend not found'}), 404
+INDEX_HTML, INDEX_ETAG = load_index_html()
+
+def index_response():
+    """Serve the cached index.html, answering 304 when the client already has it"""
+    response = Response(INDEX_HTML, mimetype='text/html')
+    response.set_etag(INDEX_ETAG)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/<path:rest>')
+def api_not_found(rest):
+    """Unknown API paths 404 instead of falling through to the React app"""
+    abort(404)
+
+def serve_react_app(path=None):
+    """Serve the React frontend for the root and every client-side route"""
+    return index_response()
+
+# Shown at / when the frontend hasn't been built; encoded once since it never changes
+FRONTEND_HINT_JSON = app.json.dumps({
+    'message': 'Frontend not built yet. Please run the frontend separately.',
+    'backend_status': 'running',
+    'api_endpoints': [
+        '/api/health',
+        '/api/auth/register',
+        '/api/auth/login',
+        '/api/chat'
+    ]
+})
+
+def serve_frontend_hint():
+    """Point at the API when the frontend isn't built"""
+    return Response(FRONTEND_HINT_JSON, mimetype='application/json')
+
+def serve_frontend_missing(path):
+    """Client-side routes can't be served without the built frontend"""
+    return jsonify({'error': 'Frontend not found'}), 404
+
+# Serve React frontend, choosing the handlers once based on whether it was built
+if INDEX_HTML is not None:
+    app.add_url_rule('/', 'serve_react_app', serve_react_app)
+    app.add_url_rule('/<path:path>', 'serve_react_routes', serve_react_app)
+else:
+    app.add_url_rule('/', 'serve_react_app', serve_frontend_hint)
+    app.add_url_rule('/<path:path>', 'serve_react_routes', serve_frontend_missing)
 
 if __name__ == '__main__':
     # Print startup information
@@ -992,13 +1338,6 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'True').lower() == 'true'
     
-<<<<<<< HEAD
-    print("🚀 Starting Study Buddy...")
-    print(f"🔧 Gemini API configured: {bool(gemini_api_key)}")
-    print(f"🧠 Components initialized: Planner={planner is not None}, Executor={executor is not None}, Memory={memory is not None}")
-    print(f"🌐 Server running on port {port}")
-=======
     print(f"🌐 Server starting on http://localhost:{port}")
->>>>>>> 7b0e4d1fbe0a6fa01447a654691ee9c8c3ffaca3
     
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -3,36 +3,99 @@ Agent Memory Module
 """
 import os
 import json
+import mmap
+from collections import deque
 from datetime import datetime
+from itertools import islice
 from typing import List, Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Most recent interactions kept in memory and read back from the file on startup
+MEMORY_HISTORY_LIMIT = 1024
+
 class AgentMemory:
     """
     Handles memory storage and retrieval for the agentic AI.
     Stores conversation history and provides context for new interactions.
+    History is persisted as JSON Lines so each interaction is a single append,
+    and only the most recent MEMORY_HISTORY_LIMIT interactions are kept in memory.
     """
 
-    def __init__(self, memory_file: str = "agent_memory.json"):
+    def __init__(self, memory_file: str = "agent_memory.jsonl"):
         """Initialize memory with optional persistent storage."""
         self.memory_file = memory_file
-        self.history = []
+        self.history = deque(maxlen=MEMORY_HISTORY_LIMIT)
         self._load_memory()
 
+    @staticmethod
+    def _dumps_line(interaction: Dict[str, Any]) -> bytes:
+        """Serialize one interaction as a JSON Lines record."""
+        if orjson:
+            return orjson.dumps(interaction) + b'\n'
+        return json.dumps(interaction).encode() + b'\n'
+
+    def _read_tail_lines(self, count: int) -> List[bytes]:
+        """Read the last `count` lines of the memory file without scanning the rest."""
+        with open(self.memory_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = len(mm)
+                search_end = end - 1 if mm[end - 1:end] == b'\n' else end
+                start = 0
+                for _ in range(count):
+                    newline = mm.rfind(b'\n', 0, search_end)
+                    if newline == -1:
+                        start = 0
+                        break
+                    start = newline + 1
+                    search_end = newline
+                return mm[start:end].splitlines()
+
+    def _import_legacy_memory(self):
+        """Convert history saved as a single JSON array (agent_memory.json) to JSON Lines."""
+        legacy_file = os.path.splitext(self.memory_file)[0] + '.json'
+        if legacy_file == self.memory_file or not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, 'r') as f:
+                self.history.extend(json.load(f))
+        except (ValueError, IOError) as e:
+            print(f"Warning: Could not import legacy memory file. Error: {e}")
+            self.history.clear()
+            return
+        self._save_memory()
+
     def _load_memory(self):
-        """Load memory from the specified JSON file if it exists."""
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, 'r') as f:
-                    self.history = json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Warning: Could not load memory file. Starting fresh. Error: {e}")
-                self.history = []
+        """Load the most recent interactions from the JSON Lines file if it exists."""
+        if not os.path.exists(self.memory_file):
+            self._import_legacy_memory()
+            return
+        try:
+            loads = orjson.loads if orjson else json.loads
+            lines = self._read_tail_lines(MEMORY_HISTORY_LIMIT)
+            self.history.extend(loads(line) for line in lines if line.strip())
+        except (ValueError, IOError) as e:
+            print(f"Warning: Could not load memory file. Starting fresh. Error: {e}")
+            self.history.clear()
 
     def _save_memory(self):
-        """Save the current memory state to the JSON file."""
+        """Rewrite the whole memory file from the current history."""
+        try:
+            with open(self.memory_file, 'wb') as f:
+                f.write(b''.join(self._dumps_line(interaction) for interaction in self.history))
+        except IOError as e:
+            print(f"Warning: Could not save memory file. Error: {e}")
+
+    def _append_memory(self, interaction: Dict[str, Any]):
+        """Append a single interaction to the memory file."""
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump(self.history, f, indent=2)
+            with open(self.memory_file, 'ab') as f:
+                f.write(self._dumps_line(interaction))
         except IOError as e:
             print(f"Warning: Could not save memory file. Error: {e}")
 
@@ -50,7 +113,7 @@ class AgentMemory:
             'execution_results': execution_results or []
         }
         self.history.append(interaction)
-        self._save_memory()
+        self._append_memory(interaction)
 
     def get_relevant_context(self, user_input: str, max_items: int = 5) -> Dict[str, Any]:
         """
@@ -59,7 +122,7 @@ class AgentMemory:
         """
         # The user_input is not used in this simple implementation,
         # but is kept for future, more advanced semantic search.
-        recent_history = self.history[-max_items:]
+        recent_history = list(islice(reversed(self.history), max_items))[::-1]
         return {
             "conversation_history": recent_history
         }
@@ -75,5 +138,5 @@ class AgentMemory:
         """
         Reset the in-memory history and clears the memory file.
         """
-        self.history = []
+        self.history.clear()
         self._save_memory()
@@ -2,14 +2,38 @@
 Database models for the AI Study Buddy application
 """
 import sqlite3
+import atexit
 import hashlib
+import hmac
+import os
+import queue
+import threading
+import time
 import uuid
 import json
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from flask_login import UserMixin
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON column encoding, using orjson when it is installed
+if orjson:
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any) -> str:
+        """Serialize a value for a JSON text column"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 class ContentUploadStatus(Enum):
     PENDING = "pending"
     UPLOADED = "uploaded"
@@ -21,6 +45,252 @@ class StudySessionStatus(Enum):
     COMPLETED = "completed"
     SKIPPED = "skipped"
 
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime, matching the ISO strings stored in timestamp columns"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+# scrypt cost parameters for password hashing (16MB of memory per hash)
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Recently verified (password hash, password digest) pairs, so repeated logins skip the KDF.
+# Digests are keyed BLAKE2b with a per-process secret, so cached entries can't be matched offline.
+PASSWORD_CACHE_TTL_SECONDS = 300
+PASSWORD_CACHE_MAX_SIZE = 1024
+_PASSWORD_CACHE_KEY = os.urandom(32)
+_verified_passwords: Dict[tuple, float] = {}
+
+def verify_password_hash(password_hash: str, password: str) -> bool:
+    """Check a password against a stored scrypt or legacy SHA-256 hash"""
+    if not password_hash.startswith('scrypt$'):
+        legacy_hash = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(password_hash, legacy_hash)
+    
+    _, n, r, p, salt_hex, hash_hex = password_hash.split('$')
+    digest = hashlib.scrypt(
+        password.encode(), salt=bytes.fromhex(salt_hex),
+        n=int(n), r=int(r), p=int(p), dklen=len(hash_hex) // 2
+    )
+    return hmac.compare_digest(digest.hex(), hash_hex)
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest keying a material's text in material_contents"""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def new_ids(count: int) -> List[str]:
+    """Generate random (version 4) UUID strings for a bulk insert from a single urandom read"""
+    random_bytes = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=random_bytes[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+# Prepared statements kept per connection, enough for every query in Database
+SQLITE_STATEMENT_CACHE_SIZE = 256
+
+# Most connections kept open at once; callers wait for a free one beyond this
+SQLITE_POOL_SIZE = max(4, os.cpu_count() or 1)
+
+# How long a writer waits on another connection's lock before raising "database is locked"
+SQLITE_BUSY_TIMEOUT_SECONDS = 5.0
+
+# Per-connection settings, run once when the pool opens a connection
+SQLITE_CONNECTION_PRAGMAS = '''
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA foreign_keys=ON;
+PRAGMA wal_autocheckpoint=1000;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-64000;
+'''
+
+# Per-process cache of users loaded by id or email, so authenticated requests skip the users lookup.
+# Rows are cached and each lookup builds a fresh User, since callers assign to user attributes.
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_MAX_SIZE = 4096
+
+# Per-process cache of courses loaded by id, for the ownership checks and agent tools that re-read them.
+# Course rows are never updated after creation (materials and plans live in their own tables),
+# so entries only expire; any future write to a course row must drop its entry here. Rows are
+# cached and each lookup builds a fresh Course, so callers never share decoded outline dicts.
+COURSE_CACHE_TTL_SECONDS = 60
+COURSE_CACHE_MAX_SIZE = 4096
+
+# Short-lived cache of each course's latest study plan, dropped when a plan is created
+STUDY_PLAN_CACHE_TTL_SECONDS = 5
+STUDY_PLAN_CACHE_MAX_SIZE = 1024
+
+# Base schema (version 1): every table and index, applied in one transaction
+SCHEMA_SQL = '''
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    profile_data TEXT DEFAULT '{}'
+);
+
+-- Courses table
+CREATE TABLE IF NOT EXISTS courses (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    course_outline TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    metadata TEXT DEFAULT '{}',
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Course materials table
+CREATE TABLE IF NOT EXISTS course_materials (
+    id TEXT PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    file_path TEXT,
+    content_text TEXT,
+    uploaded_at TEXT NOT NULL,
+    week_number INTEGER,
+    topics TEXT DEFAULT '[]',
+    metadata TEXT DEFAULT '{}',
+    FOREIGN KEY (course_id) REFERENCES courses (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Study plans table
+CREATE TABLE IF NOT EXISTS study_plans (
+    id TEXT PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    plan_data TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    status TEXT DEFAULT 'active',
+    FOREIGN KEY (course_id) REFERENCES courses (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Study sessions table
+CREATE TABLE IF NOT EXISTS study_sessions (
+    id TEXT PRIMARY KEY,
+    study_plan_id TEXT NOT NULL,
+    course_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_number INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    topics TEXT NOT NULL,
+    scheduled_date TEXT NOT NULL,
+    estimated_duration INTEGER NOT NULL,
+    content_requirements TEXT NOT NULL,
+    study_guide TEXT NOT NULL,
+    status TEXT DEFAULT 'scheduled',
+    completed_at TEXT,
+    validation_score REAL,
+    notes TEXT,
+    FOREIGN KEY (study_plan_id) REFERENCES study_plans (id),
+    FOREIGN KEY (course_id) REFERENCES courses (id),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Legacy study sessions table for tracking progress
+CREATE TABLE IF NOT EXISTS legacy_study_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    session_type TEXT NOT NULL,
+    duration_minutes INTEGER,
+    score REAL,
+    completed_at TEXT NOT NULL,
+    metadata TEXT DEFAULT '{}',
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Generated agent responses keyed by request shape and slot values
+CREATE TABLE IF NOT EXISTS generated_responses (
+    prompt_key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+-- Index for per-user progress aggregation by status and completion time
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_status
+    ON study_sessions (user_id, status, completed_at);
+
+-- Indexes for the per-user and per-course lookups, matching their ORDER BY clauses
+CREATE INDEX IF NOT EXISTS idx_courses_user
+    ON courses (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_course_materials_course
+    ON course_materials (course_id, uploaded_at);
+CREATE INDEX IF NOT EXISTS idx_study_plans_course
+    ON study_plans (course_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_study_plans_user_status
+    ON study_plans (user_id, status);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_plan
+    ON study_sessions (study_plan_id, session_number);
+
+PRAGMA user_version = 1;
+'''
+
+# Later schema changes as (version, script) pairs, applied in order to databases below each version.
+# Each script runs inside the IMMEDIATE transaction opened by apply_schema_script.
+SCHEMA_MIGRATIONS = [
+    (2, '''
+-- Material text stored once per SHA-256 digest, outside the course_materials rows
+CREATE TABLE IF NOT EXISTS material_contents (
+    content_hash TEXT PRIMARY KEY,
+    content_text TEXT NOT NULL
+);
+ALTER TABLE course_materials ADD COLUMN content_hash TEXT;
+INSERT OR IGNORE INTO material_contents (content_hash, content_text)
+    SELECT sha256_hex(content_text), content_text FROM course_materials WHERE content_text IS NOT NULL;
+UPDATE course_materials SET content_hash = sha256_hex(content_text), content_text = NULL
+    WHERE content_text IS NOT NULL;
+
+PRAGMA user_version = 2;
+'''),
+    (3, '''
+-- Responses cached before keys included the user can never be read again
+DELETE FROM generated_responses;
+CREATE INDEX IF NOT EXISTS idx_generated_responses_expires
+    ON generated_responses (expires_at);
+
+PRAGMA user_version = 3;
+'''),
+]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+def sql_statements(script: str) -> List[str]:
+    """Split a schema script into its complete statements"""
+    statements, pending = [], ''
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ''
+    return statements
+
+def apply_schema_script(conn: sqlite3.Connection, version: int, script: str) -> bool:
+    """
+    Apply a schema script unless the database is already at its version.
+    The version is re-read under a write lock, so when several workers start
+    at once only the first applies the script and the others skip it.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= version:
+            conn.rollback()
+            return False
+        for statement in sql_statements(script):
+            conn.execute(statement)
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+
 class User(UserMixin):
     """User model for authentication and profile management"""
     
@@ -35,12 +305,35 @@ class User(UserMixin):
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash a password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash a password using scrypt with a random salt"""
+        salt = os.urandom(16)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=32)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    
+    def needs_rehash(self) -> bool:
+        """Whether the stored hash uses the legacy unsalted SHA-256 format"""
+        return not self.password_hash.startswith('scrypt$')
     
     def check_password(self, password: str) -> bool:
         """Check if provided password matches the stored hash"""
-        return self.password_hash == self.hash_password(password)
+        if self.needs_rehash():
+            return verify_password_hash(self.password_hash, password)
+        
+        cache_key = (
+            self.password_hash,
+            hashlib.blake2b(password.encode(), key=_PASSWORD_CACHE_KEY, digest_size=32).digest()
+        )
+        expires_at = _verified_passwords.get(cache_key)
+        if expires_at and expires_at > time.monotonic():
+            return True
+        
+        if not verify_password_hash(self.password_hash, password):
+            return False
+        
+        if len(_verified_passwords) >= PASSWORD_CACHE_MAX_SIZE:
+            _verified_passwords.clear()
+        _verified_passwords[cache_key] = time.monotonic() + PASSWORD_CACHE_TTL_SECONDS
+        return True
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert user to dictionary (excluding password)"""
@@ -52,18 +345,52 @@ class User(UserMixin):
             'profile_data': self.profile_data
         }
 
+_UNDECODED = object()
+
+class LazyJSON:
+    """
+    Model attribute for a JSON column. Assigning stores the raw value; the
+    first read decodes it (if it is still a string) and keeps the result,
+    so repeated to_dict calls and renders don't re-parse it. Needs
+    '_<name>_raw' and '_<name>' in the owning class's __slots__.
+    """
+    
+    def __set_name__(self, owner, name):
+        self.raw_name = f'_{name}_raw'
+        self.decoded_name = f'_{name}'
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.decoded_name)
+        if value is _UNDECODED:
+            raw = getattr(obj, self.raw_name)
+            value = json_loads(raw) if isinstance(raw, (str, bytes)) else raw
+            setattr(obj, self.decoded_name, value)
+        return value
+    
+    def __set__(self, obj, value):
+        setattr(obj, self.raw_name, value)
+        setattr(obj, self.decoded_name, _UNDECODED)
+
 class Course:
     """Course model representing a complete course with all materials and study plan"""
     
+    __slots__ = ('id', 'user_id', 'title', 'description', '_course_outline_raw', '_course_outline',
+                 'created_at', '_metadata_raw', '_metadata')
+    
+    course_outline = LazyJSON()  # JSON with course structure
+    metadata = LazyJSON()
+    
     def __init__(self, course_id: str, user_id: str, title: str, description: str,
                  course_outline: str, created_at: str, metadata: str = "{}"):
         self.id = course_id
         self.user_id = user_id
         self.title = title
         self.description = description
-        self.course_outline = course_outline  # JSON string with course structure
+        self.course_outline = course_outline
         self.created_at = created_at
-        self.metadata = json.loads(metadata)
+        self.metadata = metadata
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -71,7 +398,7 @@ class Course:
             'user_id': self.user_id,
             'title': self.title,
             'description': self.description,
-            'course_outline': json.loads(self.course_outline) if isinstance(self.course_outline, str) else self.course_outline,
+            'course_outline': self.course_outline,
             'created_at': self.created_at,
             'metadata': self.metadata
         }
@@ -79,12 +406,16 @@ class Course:
 class StudyPlan:
     """Study plan model with scheduled sessions and content requirements"""
     
+    __slots__ = ('id', 'course_id', 'user_id', '_plan_data_raw', '_plan_data', 'created_at', 'updated_at', 'status')
+    
+    plan_data = LazyJSON()
+    
     def __init__(self, plan_id: str, course_id: str, user_id: str, plan_data: str,
                  created_at: str, updated_at: str, status: str = "active"):
         self.id = plan_id
         self.course_id = course_id
         self.user_id = user_id
-        self.plan_data = json.loads(plan_data) if isinstance(plan_data, str) else plan_data
+        self.plan_data = plan_data
         self.created_at = created_at
         self.updated_at = updated_at
         self.status = status
@@ -103,6 +434,14 @@ class StudyPlan:
 class StudySession:
     """Individual study session within a study plan"""
     
+    __slots__ = ('id', 'study_plan_id', 'course_id', 'user_id', 'session_number', 'title',
+                 '_topics_raw', '_topics', 'scheduled_date', 'estimated_duration',
+                 '_content_requirements_raw', '_content_requirements', 'study_guide',
+                 'status', 'completed_at', 'validation_score', 'notes')
+    
+    topics = LazyJSON()
+    content_requirements = LazyJSON()
+    
     def __init__(self, session_id: str, study_plan_id: str, course_id: str, user_id: str,
                  session_number: int, title: str, topics: str, scheduled_date: str,
                  estimated_duration: int, content_requirements: str, study_guide: str,
@@ -114,10 +453,10 @@ class StudySession:
         self.user_id = user_id
         self.session_number = session_number
         self.title = title
-        self.topics = json.loads(topics) if isinstance(topics, str) else topics
+        self.topics = topics
         self.scheduled_date = scheduled_date
         self.estimated_duration = estimated_duration
-        self.content_requirements = json.loads(content_requirements) if isinstance(content_requirements, str) else content_requirements
+        self.content_requirements = content_requirements
         self.study_guide = study_guide
         self.status = status
         self.completed_at = completed_at
@@ -146,124 +485,120 @@ class StudySession:
 class Database:
     """Enhanced SQLite database manager for course and study plan management"""
     
+    # Hot lookups with explicit column lists, in model constructor order. Each
+    # connection's statement cache keeps these compiled across calls.
+    _SQL_GET_USER_BY_ID = (
+        'SELECT id, email, username, password_hash, created_at, profile_data FROM users WHERE id = ?'
+    )
+    _SQL_GET_USER_BY_EMAIL = (
+        'SELECT id, email, username, password_hash, created_at, profile_data FROM users WHERE email = ?'
+    )
+    _SQL_GET_COURSE = (
+        'SELECT id, user_id, title, description, course_outline, created_at, metadata FROM courses WHERE id = ?'
+    )
+    
+    # Column lists for the remaining getters, also in model constructor order
+    _COURSE_COLUMNS = 'id, user_id, title, description, course_outline, created_at, metadata'
+    _STUDY_PLAN_COLUMNS = 'id, course_id, user_id, plan_data, created_at, updated_at, status'
+    _STUDY_SESSION_COLUMNS = (
+        'id, study_plan_id, course_id, user_id, session_number, title, topics, scheduled_date, '
+        'estimated_duration, content_requirements, study_guide, status, completed_at, '
+        'validation_score, notes'
+    )
+    
     def __init__(self, db_path: str = "study_buddy.db"):
         self.db_path = db_path
+        self._local = threading.local()
+        self._pool = queue.LifoQueue()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._user_cache = OrderedDict()
+        self._user_ids_by_email = {}
+        self._user_cache_lock = threading.Lock()
+        self._course_cache = OrderedDict()
+        self._course_cache_lock = threading.Lock()
+        self._plan_cache: Dict[str, tuple] = {}
+        self._plan_cache_lock = threading.Lock()
+        atexit.register(self.close_connections)
         self.init_db()
     
-    def get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a pooled connection configured for concurrent readers"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=SQLITE_BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            cached_statements=SQLITE_STATEMENT_CACHE_SIZE
+        )
         conn.row_factory = sqlite3.Row  # Enable column access by name
+        conn.executescript(SQLITE_CONNECTION_PRAGMAS)
         return conn
     
+    def _acquire_connection(self) -> sqlite3.Connection:
+        """Take an idle connection, opening one if the pool isn't full, else wait"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._connections_lock:
+            if len(self._connections) < SQLITE_POOL_SIZE:
+                conn = self._open_connection()
+                self._connections.append(conn)
+                return conn
+        return self._pool.get()
+    
+    @contextmanager
+    def get_connection(self):
+        """
+        Borrow a pooled connection for the duration of a with block, committing
+        on success and rolling back on error. Nested calls on the same thread
+        reuse the connection the thread already holds.
+        """
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+        
+        conn = self._acquire_connection()
+        self._local.conn = conn
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.conn = None
+            self._pool.put(conn)
+    
+    def close_connections(self):
+        """Close every connection opened by this database"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._pool = queue.LifoQueue()
+    
     def init_db(self):
-        """Initialize database tables"""
+        """Initialize database tables, skipping the DDL when the schema is already current"""
         with self.get_connection() as conn:
-            # Users table
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id TEXT PRIMARY KEY,
-                    email TEXT UNIQUE NOT NULL,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    profile_data TEXT DEFAULT '{}'
-                )
-            ''')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            schema_changed = False
+            if version < 1:
+                schema_changed |= apply_schema_script(conn, 1, SCHEMA_SQL)
             
-            # Courses table
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS courses (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    course_outline TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    metadata TEXT DEFAULT '{}',
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
+            conn.create_function('sha256_hex', 1, content_hash, deterministic=True)
+            for migration_version, migration_sql in SCHEMA_MIGRATIONS:
+                if version < migration_version:
+                    schema_changed |= apply_schema_script(conn, migration_version, migration_sql)
             
-            # Course materials table
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS course_materials (
-                    id TEXT PRIMARY KEY,
-                    course_id TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    content_type TEXT NOT NULL,
-                    file_path TEXT,
-                    content_text TEXT,
-                    uploaded_at TEXT NOT NULL,
-                    week_number INTEGER,
-                    topics TEXT DEFAULT '[]',
-                    metadata TEXT DEFAULT '{}',
-                    FOREIGN KEY (course_id) REFERENCES courses (id),
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
-            # Study plans table
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS study_plans (
-                    id TEXT PRIMARY KEY,
-                    course_id TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    plan_data TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    status TEXT DEFAULT 'active',
-                    FOREIGN KEY (course_id) REFERENCES courses (id),
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
-            # Study sessions table
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS study_sessions (
-                    id TEXT PRIMARY KEY,
-                    study_plan_id TEXT NOT NULL,
-                    course_id TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    session_number INTEGER NOT NULL,
-                    title TEXT NOT NULL,
-                    topics TEXT NOT NULL,
-                    scheduled_date TEXT NOT NULL,
-                    estimated_duration INTEGER NOT NULL,
-                    content_requirements TEXT NOT NULL,
-                    study_guide TEXT NOT NULL,
-                    status TEXT DEFAULT 'scheduled',
-                    completed_at TEXT,
-                    validation_score REAL,
-                    notes TEXT,
-                    FOREIGN KEY (study_plan_id) REFERENCES study_plans (id),
-                    FOREIGN KEY (course_id) REFERENCES courses (id),
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
-            # Legacy study sessions table for tracking progress
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS legacy_study_sessions (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    session_type TEXT NOT NULL,
-                    duration_minutes INTEGER,
-                    score REAL,
-                    completed_at TEXT NOT NULL,
-                    metadata TEXT DEFAULT '{}',
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
-            conn.commit()
+            # Refresh planner statistics after a schema change, sampling large tables so startup stays fast
+            if schema_changed:
+                conn.execute('PRAGMA analysis_limit=400')
+                conn.execute('ANALYZE')
     
     def create_user(self, email: str, username: str, password: str) -> Optional[User]:
         """Create a new user"""
         user_id = str(uuid.uuid4())
         password_hash = User.hash_password(password)
-        created_at = datetime.utcnow().isoformat()
+        created_at = utc_now().isoformat()
         
         try:
             with self.get_connection() as conn:
@@ -277,34 +612,76 @@ class Database:
         except sqlite3.IntegrityError:
             return None  # User already exists
     
+    def _get_cached_user(self, user_id: str) -> Optional[User]:
+        """Return a new User built from the cached row if the entry has not expired"""
+        with self._user_cache_lock:
+            entry = self._user_cache.get(user_id)
+            if entry and entry[1] > time.monotonic():
+                self._user_cache.move_to_end(user_id)
+                return User(*entry[0])
+            return None
+    
+    def _cache_user(self, row: tuple) -> None:
+        """Cache a user row by id, evicting the least recently used entry when full"""
+        user_id, email = row[0], row[1]
+        with self._user_cache_lock:
+            self._user_cache[user_id] = (row, time.monotonic() + USER_CACHE_TTL_SECONDS)
+            self._user_cache.move_to_end(user_id)
+            self._user_ids_by_email[email] = user_id
+            if len(self._user_cache) > USER_CACHE_MAX_SIZE:
+                _, (evicted, _) = self._user_cache.popitem(last=False)
+                self._user_ids_by_email.pop(evicted[1], None)
+    
+    def invalidate_cached_user(self, user_id: str) -> None:
+        """Drop a user from the cache after their record changes"""
+        with self._user_cache_lock:
+            entry = self._user_cache.pop(user_id, None)
+            if entry:
+                self._user_ids_by_email.pop(entry[0][1], None)
+    
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID"""
+        user = self._get_cached_user(user_id)
+        if user:
+            return user
+        
         with self.get_connection() as conn:
-            row = conn.execute(
-                'SELECT * FROM users WHERE id = ?', (user_id,)
-            ).fetchone()
+            row = conn.execute(self._SQL_GET_USER_BY_ID, (user_id,)).fetchone()
             
             if row:
-                return User(
-                    row['id'], row['email'], row['username'], 
-                    row['password_hash'], row['created_at'], row['profile_data']
-                )
+                self._cache_user(tuple(row))
+                return User(*row)
             return None
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
+        user_id = self._user_ids_by_email.get(email)
+        user = self._get_cached_user(user_id) if user_id else None
+        if user and user.email == email:
+            return user
+        
         with self.get_connection() as conn:
-            row = conn.execute(
-                'SELECT * FROM users WHERE email = ?', (email,)
-            ).fetchone()
+            row = conn.execute(self._SQL_GET_USER_BY_EMAIL, (email,)).fetchone()
             
             if row:
-                return User(
-                    row['id'], row['email'], row['username'], 
-                    row['password_hash'], row['created_at'], row['profile_data']
-                )
+                self._cache_user(tuple(row))
+                return User(*row)
             return None
     
+    def update_user_password_hash(self, user_id: str, password_hash: str) -> bool:
+        """Replace a user's stored password hash"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    'UPDATE users SET password_hash = ? WHERE id = ?',
+                    (password_hash, user_id)
+                )
+                conn.commit()
+                self.invalidate_cached_user(user_id)
+                return True
+        except Exception:
+            return False
+    
     def update_user_profile(self, user_id: str, profile_data: str) -> bool:
         """Update user profile data"""
         try:
@@ -314,6 +691,7 @@ class Database:
                     (profile_data, user_id)
                 )
                 conn.commit()
+                self.invalidate_cached_user(user_id)
                 return True
         except Exception:
             return False
@@ -322,13 +700,13 @@ class Database:
     def create_course(self, user_id: str, title: str, description: str, course_outline: Dict[str, Any]) -> str:
         """Create a new course"""
         course_id = str(uuid.uuid4())
-        created_at = datetime.utcnow().isoformat()
+        created_at = utc_now().isoformat()
         
         with self.get_connection() as conn:
             conn.execute('''
                 INSERT INTO courses (id, user_id, title, description, course_outline, created_at)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (course_id, user_id, title, description, json.dumps(course_outline), created_at))
+            ''', (course_id, user_id, title, description, json_dumps(course_outline), created_at))
             conn.commit()
             
         return course_id
@@ -336,45 +714,48 @@ class Database:
     def get_course(self, course_id: str) -> Optional[Course]:
         """Get course by ID"""
         with self.get_connection() as conn:
-            row = conn.execute(
-                'SELECT * FROM courses WHERE id = ?', (course_id,)
-            ).fetchone()
+            row = conn.execute(self._SQL_GET_COURSE, (course_id,)).fetchone()
             
             if row:
-                return Course(
-                    row['id'], row['user_id'], row['title'], row['description'],
-                    row['course_outline'], row['created_at'], row['metadata']
-                )
+                return Course(*row)
             return None
     
     def get_user_courses(self, user_id: str) -> List[Course]:
         """Get all courses for a user"""
         with self.get_connection() as conn:
             rows = conn.execute(
-                'SELECT * FROM courses WHERE user_id = ? ORDER BY created_at DESC',
+                f'SELECT {self._COURSE_COLUMNS} FROM courses WHERE user_id = ? ORDER BY created_at DESC',
                 (user_id,)
             ).fetchall()
             
-            return [Course(
-                row['id'], row['user_id'], row['title'], row['description'],
-                row['course_outline'], row['created_at'], row['metadata']
-            ) for row in rows]
+            return [Course(*row) for row in rows]
+    
+    @staticmethod
+    def _store_material_contents(conn: sqlite3.Connection, texts: List[Optional[str]]) -> List[Optional[str]]:
+        """Store material texts once per digest in material_contents and return their hashes"""
+        hashes = [content_hash(text) if text is not None else None for text in texts]
+        conn.executemany(
+            'INSERT OR IGNORE INTO material_contents (content_hash, content_text) VALUES (?, ?)',
+            [(text_hash, text) for text_hash, text in zip(hashes, texts) if text is not None]
+        )
+        return hashes
     
     def add_course_material(self, course_id: str, user_id: str, title: str, content_type: str,
                            content_text: str = None, file_path: str = None, week_number: int = None,
                            topics: List[str] = None) -> str:
         """Add course material to a course"""
         material_id = str(uuid.uuid4())
-        uploaded_at = datetime.utcnow().isoformat()
+        uploaded_at = utc_now().isoformat()
         
         with self.get_connection() as conn:
+            text_hash, = self._store_material_contents(conn, [content_text])
             conn.execute('''
                 INSERT INTO course_materials 
-                (id, course_id, user_id, title, content_type, file_path, content_text, 
+                (id, course_id, user_id, title, content_type, file_path, content_hash, 
                  uploaded_at, week_number, topics)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (material_id, course_id, user_id, title, content_type, file_path, 
-                  content_text, uploaded_at, week_number, json.dumps(topics or [])))
+                  text_hash, uploaded_at, week_number, json_dumps(topics or [])))
             conn.commit()
             
         return material_id
@@ -383,8 +764,12 @@ class Database:
         """Get all materials for a course"""
         with self.get_connection() as conn:
             rows = conn.execute(
-                '''SELECT * FROM course_materials WHERE course_id = ? 
-                   ORDER BY week_number ASC, uploaded_at ASC''',
+                '''SELECT cm.id, cm.course_id, cm.user_id, cm.title, cm.content_type, cm.file_path,
+                          mc.content_text, cm.uploaded_at, cm.week_number, cm.topics, cm.metadata
+                   FROM course_materials cm
+                   LEFT JOIN material_contents mc ON mc.content_hash = cm.content_hash
+                   WHERE cm.course_id = ? 
+                   ORDER BY cm.week_number ASC, cm.uploaded_at ASC''',
                 (course_id,)
             ).fetchall()
             
@@ -398,52 +783,48 @@ class Database:
                 'content_text': row['content_text'],
                 'uploaded_at': row['uploaded_at'],
                 'week_number': row['week_number'],
-                'topics': json.loads(row['topics']),
-                'metadata': json.loads(row['metadata'])
+                'topics': json_loads(row['topics']),
+                'metadata': json_loads(row['metadata'])
             } for row in rows]
     
     # Study Plan Management Methods
     def create_study_plan(self, course_id: str, user_id: str, plan_data: Dict[str, Any]) -> str:
         """Create a study plan for a course"""
         plan_id = str(uuid.uuid4())
-        created_at = datetime.utcnow().isoformat()
+        created_at = utc_now().isoformat()
         
         with self.get_connection() as conn:
             conn.execute('''
                 INSERT INTO study_plans (id, course_id, user_id, plan_data, created_at, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (plan_id, course_id, user_id, json.dumps(plan_data), created_at, created_at))
+            ''', (plan_id, course_id, user_id, json_dumps(plan_data), created_at, created_at))
             conn.commit()
             
+        self.invalidate_cached_study_plan(course_id)
         return plan_id
     
     def get_study_plan(self, plan_id: str) -> Optional[StudyPlan]:
         """Get study plan by ID"""
         with self.get_connection() as conn:
             row = conn.execute(
-                'SELECT * FROM study_plans WHERE id = ?', (plan_id,)
+                f'SELECT {self._STUDY_PLAN_COLUMNS} FROM study_plans WHERE id = ?', (plan_id,)
             ).fetchone()
             
             if row:
-                return StudyPlan(
-                    row['id'], row['course_id'], row['user_id'], row['plan_data'],
-                    row['created_at'], row['updated_at'], row['status']
-                )
+                return StudyPlan(*row)
             return None
     
     def get_course_study_plan(self, course_id: str) -> Optional[StudyPlan]:
         """Get active study plan for a course"""
         with self.get_connection() as conn:
             row = conn.execute(
-                'SELECT * FROM study_plans WHERE course_id = ? AND status = "active" ORDER BY created_at DESC LIMIT 1',
+                f'SELECT {self._STUDY_PLAN_COLUMNS} FROM study_plans '
+                'WHERE course_id = ? AND status = "active" ORDER BY created_at DESC LIMIT 1',
                 (course_id,)
             ).fetchone()
             
             if row:
-                return StudyPlan(
-                    row['id'], row['course_id'], row['user_id'], row['plan_data'],
-                    row['created_at'], row['updated_at'], row['status']
-                )
+                return StudyPlan(*row)
             return None
     
     def create_study_session(self, study_plan_id: str, course_id: str, user_id: str,
@@ -451,39 +832,49 @@ class Database:
                            scheduled_date: str, estimated_duration: int,
                            content_requirements: Dict[str, Any], study_guide: str) -> str:
         """Create a study session"""
-        session_id = str(uuid.uuid4())
+        session_id, = self.create_study_sessions(study_plan_id, course_id, user_id, [{
+            'session_number': session_number, 'title': title, 'topics': topics,
+            'scheduled_date': scheduled_date, 'estimated_duration': estimated_duration,
+            'content_requirements': content_requirements, 'study_guide': study_guide
+        }])
+        return session_id
+    
+    def create_study_sessions(self, study_plan_id: str, course_id: str, user_id: str,
+                              sessions: List[Dict[str, Any]]) -> List[str]:
+        """Create all sessions of a study plan in one transaction and return their IDs"""
+        session_ids = new_ids(len(sessions))
+        rows = [
+            (session_id, study_plan_id, course_id, user_id, session['session_number'], session['title'],
+             json_dumps(session['topics']), session['scheduled_date'], session['estimated_duration'],
+             json_dumps(session['content_requirements']), session['study_guide'])
+            for session_id, session in zip(session_ids, sessions)
+        ]
         
         with self.get_connection() as conn:
-            conn.execute('''
+            conn.executemany('''
                 INSERT INTO study_sessions 
                 (id, study_plan_id, course_id, user_id, session_number, title, topics,
                  scheduled_date, estimated_duration, content_requirements, study_guide)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (session_id, study_plan_id, course_id, user_id, session_number, title,
-                  json.dumps(topics), scheduled_date, estimated_duration,
-                  json.dumps(content_requirements), study_guide))
+            ''', rows)
             conn.commit()
             
-        return session_id
+        return session_ids
     
     def get_study_sessions(self, study_plan_id: str) -> List[StudySession]:
         """Get all study sessions for a study plan"""
         with self.get_connection() as conn:
             rows = conn.execute(
-                'SELECT * FROM study_sessions WHERE study_plan_id = ? ORDER BY session_number ASC',
+                f'SELECT {self._STUDY_SESSION_COLUMNS} FROM study_sessions '
+                'WHERE study_plan_id = ? ORDER BY session_number ASC',
                 (study_plan_id,)
             ).fetchall()
             
-            return [StudySession(
-                row['id'], row['study_plan_id'], row['course_id'], row['user_id'],
-                row['session_number'], row['title'], row['topics'], row['scheduled_date'],
-                row['estimated_duration'], row['content_requirements'], row['study_guide'],
-                row['status'], row['completed_at'], row['validation_score'], row['notes']
-            ) for row in rows]
+            return [StudySession(*row) for row in rows]
     
     def complete_study_session(self, session_id: str, validation_score: float = None, notes: str = None) -> bool:
         """Mark a study session as completed"""
-        completed_at = datetime.utcnow().isoformat()
+        completed_at = utc_now().isoformat()
         
         try:
             with self.get_connection() as conn:
@@ -503,7 +894,7 @@ class Database:
                          metadata: str = "{}") -> str:
         """Add a legacy study session record"""
         session_id = str(uuid.uuid4())
-        completed_at = datetime.utcnow().isoformat()
+        completed_at = utc_now().isoformat()
         
         with self.get_connection() as conn:
             conn.execute('''
@@ -518,48 +909,28 @@ class Database:
     def get_user_progress(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive user's study progress statistics"""
         with self.get_connection() as conn:
-            # Get total courses
-            total_courses = conn.execute(
-                'SELECT COUNT(*) as count FROM courses WHERE user_id = ?',
-                (user_id,)
-            ).fetchone()['count']
-            
-            # Get active study plans
-            active_plans = conn.execute(
-                'SELECT COUNT(*) as count FROM study_plans WHERE user_id = ? AND status = "active"',
-                (user_id,)
-            ).fetchone()['count']
+            # Course and plan counts plus session totals, weekly activity, study time
+            # and average score in a single statement
+            week_ago = (utc_now() - timedelta(days=7)).isoformat()
+            session_stats = conn.execute('''
+                SELECT (SELECT COUNT(*) FROM courses WHERE user_id = :user_id) AS total_courses,
+                       (SELECT COUNT(*) FROM study_plans
+                        WHERE user_id = :user_id AND status = 'active') AS active_plans,
+                       COUNT(*) AS total,
+                       SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed,
+                       SUM(CASE WHEN status = 'completed' AND completed_at >= :week_ago THEN 1 ELSE 0 END) AS weekly,
+                       SUM(CASE WHEN status = 'completed' THEN estimated_duration END) AS total_time,
+                       AVG(validation_score) AS avg_score
+                FROM study_sessions WHERE user_id = :user_id
+            ''', {'user_id': user_id, 'week_ago': week_ago}).fetchone()
             
-            # Get completed study sessions
-            completed_sessions = conn.execute(
-                'SELECT COUNT(*) as count FROM study_sessions WHERE user_id = ? AND status = "completed"',
-                (user_id,)
-            ).fetchone()['count']
-            
-            # Get total study sessions
-            total_sessions = conn.execute(
-                'SELECT COUNT(*) as count FROM study_sessions WHERE user_id = ?',
-                (user_id,)
-            ).fetchone()['count']
-            
-            # Get this week's completed sessions
-            week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-            weekly_sessions = conn.execute(
-                'SELECT COUNT(*) as count FROM study_sessions WHERE user_id = ? AND status = "completed" AND completed_at >= ?',
-                (user_id, week_ago)
-            ).fetchone()['count']
-            
-            # Get total study time from completed sessions
-            total_time = conn.execute(
-                'SELECT SUM(estimated_duration) as total FROM study_sessions WHERE user_id = ? AND status = "completed"',
-                (user_id,)
-            ).fetchone()['total'] or 0
-            
-            # Get average validation score
-            avg_score = conn.execute(
-                'SELECT AVG(validation_score) as avg FROM study_sessions WHERE user_id = ? AND validation_score IS NOT NULL',
-                (user_id,)
-            ).fetchone()['avg'] or 0
+            total_courses = session_stats['total_courses']
+            active_plans = session_stats['active_plans']
+            total_sessions = session_stats['total']
+            completed_sessions = session_stats['completed'] or 0
+            weekly_sessions = session_stats['weekly'] or 0
+            total_time = session_stats['total_time'] or 0
+            avg_score = session_stats['avg_score'] or 0
             
             # Calculate progress percentage
             progress = (completed_sessions / max(total_sessions, 1)) * 100 if total_sessions > 0 else 0
@@ -598,32 +969,106 @@ class Database:
             
             # Get next upcoming session
             next_session = conn.execute(
-                '''SELECT * FROM study_sessions WHERE study_plan_id = ? AND status = "scheduled" 
+                '''SELECT id, title, scheduled_date, topics
+                   FROM study_sessions WHERE study_plan_id = ? AND status = "scheduled" 
                    ORDER BY scheduled_date ASC LIMIT 1''',
                 (study_plan.id,)
             ).fetchone()
             
-            progress_percentage = (completed_sessions / max(total_sessions, 1)) * 100
+            return self._course_progress_dict(
+                course_id, study_plan.id, total_sessions, completed_sessions, next_session
+            )
+    
+    @staticmethod
+    def _course_progress_dict(course_id: str, study_plan_id: str, total_sessions: int,
+                              completed_sessions: int, next_session: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the course progress payload shared by the progress getters"""
+        progress_percentage = (completed_sessions / max(total_sessions, 1)) * 100
+        
+        return {
+            'course_id': course_id,
+            'study_plan_id': study_plan_id,
+            'total_sessions': total_sessions,
+            'completed_sessions': completed_sessions,
+            'progress_percentage': round(progress_percentage, 1),
+            'next_session': {
+                'id': next_session['id'],
+                'title': next_session['title'],
+                'scheduled_date': next_session['scheduled_date'],
+                'topics': json_loads(next_session['topics'])
+            } if next_session else None
+        }
+    
+    def get_user_courses_with_progress(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get all courses for a user with their progress in a single query"""
+        with self.get_connection() as conn:
+            rows = conn.execute('''
+                WITH latest_plans AS (
+                    SELECT id, course_id FROM (
+                        SELECT sp.id, sp.course_id,
+                               ROW_NUMBER() OVER (PARTITION BY sp.course_id ORDER BY sp.created_at DESC) AS rn
+                        FROM study_plans sp JOIN courses c ON c.id = sp.course_id
+                        WHERE c.user_id = ?
+                    ) WHERE rn = 1
+                ),
+                session_stats AS (
+                    SELECT s.study_plan_id,
+                           COUNT(*) AS total_sessions,
+                           SUM(CASE WHEN s.status = 'completed' THEN 1 ELSE 0 END) AS completed_sessions
+                    FROM study_sessions s JOIN latest_plans lp ON lp.id = s.study_plan_id
+                    GROUP BY s.study_plan_id
+                ),
+                next_sessions AS (
+                    SELECT id, study_plan_id, title, scheduled_date, topics FROM (
+                        SELECT s.id, s.study_plan_id, s.title, s.scheduled_date, s.topics,
+                               ROW_NUMBER() OVER (PARTITION BY s.study_plan_id ORDER BY s.scheduled_date ASC) AS rn
+                        FROM study_sessions s JOIN latest_plans lp ON lp.id = s.study_plan_id
+                        WHERE s.status = 'scheduled'
+                    ) WHERE rn = 1
+                )
+                SELECT c.id, c.user_id, c.title, c.description, c.course_outline, c.created_at,
+                       c.metadata, lp.id AS plan_id,
+                       COALESCE(ss.total_sessions, 0) AS total_sessions,
+                       COALESCE(ss.completed_sessions, 0) AS completed_sessions,
+                       ns.id AS next_id, ns.title AS next_title,
+                       ns.scheduled_date AS next_scheduled_date, ns.topics AS next_topics
+                FROM courses c
+                LEFT JOIN latest_plans lp ON lp.course_id = c.id
+                LEFT JOIN session_stats ss ON ss.study_plan_id = lp.id
+                LEFT JOIN next_sessions ns ON ns.study_plan_id = lp.id
+                WHERE c.user_id = ?
+                ORDER BY c.created_at DESC
+            ''', (user_id, user_id)).fetchall()
             
-            return {
-                'course_id': course_id,
-                'study_plan_id': study_plan.id,
-                'total_sessions': total_sessions,
-                'completed_sessions': completed_sessions,
-                'progress_percentage': round(progress_percentage, 1),
-                'next_session': {
-                    'id': next_session['id'],
-                    'title': next_session['title'],
-                    'scheduled_date': next_session['scheduled_date'],
-                    'topics': json.loads(next_session['topics'])
-                } if next_session else None
-            }
+            courses = []
+            for row in rows:
+                course_data = Course(
+                    row['id'], row['user_id'], row['title'], row['description'],
+                    row['course_outline'], row['created_at'], row['metadata']
+                ).to_dict()
+                
+                if row['plan_id']:
+                    next_session = {
+                        'id': row['next_id'],
+                        'title': row['next_title'],
+                        'scheduled_date': row['next_scheduled_date'],
+                        'topics': row['next_topics']
+                    } if row['next_id'] else None
+                    course_data['progress'] = self._course_progress_dict(
+                        row['id'], row['plan_id'], row['total_sessions'],
+                        row['completed_sessions'], next_session
+                    )
+                else:
+                    course_data['progress'] = {'error': 'No study plan found for course'}
+                
+                courses.append(course_data)
+            return courses
 
     def create_course(self, user_id: str, title: str, description: str, course_outline: str, metadata: Dict[str, Any] = None) -> Optional[str]:
         """Create a new course and return the course ID"""
         course_id = str(uuid.uuid4())
-        created_at = datetime.utcnow().isoformat()
-        metadata_json = json.dumps(metadata or {})
+        created_at = utc_now().isoformat()
+        metadata_json = json_dumps(metadata or {})
         
         try:
             with self.get_connection() as conn:
@@ -637,19 +1082,36 @@ class Database:
             print(f"Error creating course: {e}")
             return None
 
+    def _get_cached_course(self, course_id: str) -> Optional[Course]:
+        """Return a new Course built from the cached row if the entry has not expired"""
+        with self._course_cache_lock:
+            entry = self._course_cache.get(course_id)
+            if entry and entry[1] > time.monotonic():
+                self._course_cache.move_to_end(course_id)
+                return Course(*entry[0])
+            return None
+    
+    def _cache_course(self, row: tuple) -> None:
+        """Cache a course row by id, evicting the least recently used entry when full"""
+        course_id = row[0]
+        with self._course_cache_lock:
+            self._course_cache[course_id] = (row, time.monotonic() + COURSE_CACHE_TTL_SECONDS)
+            self._course_cache.move_to_end(course_id)
+            if len(self._course_cache) > COURSE_CACHE_MAX_SIZE:
+                self._course_cache.popitem(last=False)
+    
     def get_course(self, course_id: str) -> Optional[Course]:
         """Get a course by ID"""
+        course = self._get_cached_course(course_id)
+        if course:
+            return course
+        
         with self.get_connection() as conn:
-            row = conn.execute(
-                'SELECT * FROM courses WHERE id = ?', (course_id,)
-            ).fetchone()
+            row = conn.execute(self._SQL_GET_COURSE, (course_id,)).fetchone()
             
             if row:
-                return Course(
-                    row['id'], row['user_id'], row['title'], 
-                    row['description'], row['course_outline'], 
-                    row['created_at'], row['metadata']
-                )
+                self._cache_course(tuple(row))
+                return Course(*row)
             return None
 
     def get_user_courses(self, user_id: str) -> List[Course]:
@@ -657,16 +1119,12 @@ class Database:
         courses = []
         with self.get_connection() as conn:
             rows = conn.execute(
-                'SELECT * FROM courses WHERE user_id = ? ORDER BY created_at DESC',
+                f'SELECT {self._COURSE_COLUMNS} FROM courses WHERE user_id = ? ORDER BY created_at DESC',
                 (user_id,)
             ).fetchall()
             
             for row in rows:
-                courses.append(Course(
-                    row['id'], row['user_id'], row['title'],
-                    row['description'], row['course_outline'],
-                    row['created_at'], row['metadata']
-                ))
+                courses.append(Course(*row))
         return courses
 
     def add_course_material(self, course_id: str, user_id: str, title: str, content_type: str,
@@ -674,54 +1132,71 @@ class Database:
                            week_number: Optional[int] = None, topics: List[str] = None) -> Optional[str]:
         """Add course material and return material ID"""
         material_id = str(uuid.uuid4())
-        uploaded_at = datetime.utcnow().isoformat()
-        topics_json = json.dumps(topics or [])
+        uploaded_at = utc_now().isoformat()
+        topics_json = json_dumps(topics or [])
         
         try:
             with self.get_connection() as conn:
+                text_hash, = self._store_material_contents(conn, [content_text])
                 conn.execute('''
                     INSERT INTO course_materials 
-                    (id, course_id, user_id, title, content_type, file_path, content_text, 
+                    (id, course_id, user_id, title, content_type, file_path, content_hash, 
                      uploaded_at, week_number, topics)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (material_id, course_id, user_id, title, content_type, file_path,
-                      content_text, uploaded_at, week_number, topics_json))
+                      text_hash, uploaded_at, week_number, topics_json))
                 conn.commit()
                 return material_id
         except Exception as e:
             print(f"Error adding course material: {e}")
             return None
 
-    def get_course_materials(self, course_id: str) -> List[Dict[str, Any]]:
-        """Get all materials for a course"""
-        materials = []
+    def get_course_materials(self, course_id: str, include_content: bool = True) -> List[Dict[str, Any]]:
+        """Get all materials for a course; listings can skip reading material_contents"""
+        if include_content:
+            content_column = 'mc.content_text'
+            content_join = 'LEFT JOIN material_contents mc ON mc.content_hash = cm.content_hash'
+        else:
+            content_column, content_join = 'NULL', ''
         with self.get_connection() as conn:
-            rows = conn.execute(
-                'SELECT * FROM course_materials WHERE course_id = ? ORDER BY uploaded_at DESC',
+            cursor = conn.cursor()
+            cursor.row_factory = None  # Plain tuples, unpacked by position in one comprehension
+            rows = cursor.execute(
+                f'''SELECT cm.id, cm.course_id, cm.user_id, cm.title, cm.content_type, cm.file_path,
+                           cm.uploaded_at, cm.week_number, cm.topics, COALESCE(cm.metadata, '{{}}'),
+                           {content_column}
+                    FROM course_materials cm {content_join}
+                    WHERE cm.course_id = ? ORDER BY cm.uploaded_at DESC''',
                 (course_id,)
             ).fetchall()
-            
-            for row in rows:
-                materials.append({
-                    'id': row['id'],
-                    'course_id': row['course_id'],
-                    'user_id': row['user_id'],
-                    'title': row['title'],
-                    'content_type': row['content_type'],
-                    'file_path': row['file_path'],
-                    'content_text': row['content_text'],
-                    'uploaded_at': row['uploaded_at'],
-                    'week_number': row['week_number'],
-                    'topics': json.loads(row['topics']),
-                    'metadata': json.loads(row['metadata'] or '{}')
-                })
+        
+        loads = json_loads
+        materials = [
+            {
+                'id': material_id,
+                'course_id': material_course_id,
+                'user_id': user_id,
+                'title': title,
+                'content_type': content_type,
+                'file_path': file_path,
+                'uploaded_at': uploaded_at,
+                'week_number': week_number,
+                'topics': loads(topics),
+                'metadata': loads(metadata)
+            }
+            for (material_id, material_course_id, user_id, title, content_type, file_path,
+                 uploaded_at, week_number, topics, metadata, _) in rows
+        ]
+        if include_content:
+            for material, row in zip(materials, rows):
+                material['content_text'] = row[-1]
         return materials
 
     def create_study_plan(self, course_id: str, user_id: str, plan_data: Dict[str, Any]) -> Optional[str]:
         """Create a study plan and return plan ID"""
         plan_id = str(uuid.uuid4())
-        created_at = datetime.utcnow().isoformat()
-        plan_data_json = json.dumps(plan_data)
+        created_at = utc_now().isoformat()
+        plan_data_json = json_dumps(plan_data)
         
         try:
             with self.get_connection() as conn:
@@ -730,47 +1205,51 @@ class Database:
                     VALUES (?, ?, ?, ?, ?, ?)
                 ''', (plan_id, course_id, user_id, plan_data_json, created_at, created_at))
                 conn.commit()
-                return plan_id
+            self.invalidate_cached_study_plan(course_id)
+            return plan_id
         except Exception as e:
             print(f"Error creating study plan: {e}")
             return None
 
+    def invalidate_cached_study_plan(self, course_id: str) -> None:
+        """Drop a course's cached latest study plan after a plan is written"""
+        with self._plan_cache_lock:
+            self._plan_cache.pop(course_id, None)
+
     def get_course_study_plan(self, course_id: str) -> Optional[StudyPlan]:
         """Get study plan for a course"""
-        with self.get_connection() as conn:
-            row = conn.execute(
-                'SELECT * FROM study_plans WHERE course_id = ? ORDER BY created_at DESC LIMIT 1',
-                (course_id,)
-            ).fetchone()
-            
-            if row:
-                return StudyPlan(
-                    row['id'], row['course_id'], row['user_id'],
-                    row['plan_data'], row['created_at'], 
-                    row['updated_at'], row['status']
-                )
-            return None
+        # The row is cached rather than the StudyPlan, so callers never share a decoded plan_data
+        with self._plan_cache_lock:
+            entry = self._plan_cache.get(course_id)
+        if entry and entry[1] > time.monotonic():
+            row = entry[0]
+        else:
+            with self.get_connection() as conn:
+                row = conn.execute(
+                    f'SELECT {self._STUDY_PLAN_COLUMNS} FROM study_plans '
+                    'WHERE course_id = ? ORDER BY created_at DESC LIMIT 1',
+                    (course_id,)
+                ).fetchone()
+            row = tuple(row) if row else None
+            with self._plan_cache_lock:
+                if len(self._plan_cache) >= STUDY_PLAN_CACHE_MAX_SIZE:
+                    self._plan_cache.clear()
+                self._plan_cache[course_id] = (row, time.monotonic() + STUDY_PLAN_CACHE_TTL_SECONDS)
+        
+        return StudyPlan(*row) if row else None
 
     def add_study_session(self, study_plan_id: str, course_id: str, user_id: str,
                          session_number: int, title: str, topics: List[str],
                          scheduled_date: str, estimated_duration: int,
                          content_requirements: List[str], study_guide: str) -> Optional[str]:
         """Add a study session and return session ID"""
-        session_id = str(uuid.uuid4())
-        topics_json = json.dumps(topics)
-        requirements_json = json.dumps(content_requirements)
-        
         try:
-            with self.get_connection() as conn:
-                conn.execute('''
-                    INSERT INTO study_sessions 
-                    (id, study_plan_id, course_id, user_id, session_number, title, topics,
-                     scheduled_date, estimated_duration, content_requirements, study_guide)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (session_id, study_plan_id, course_id, user_id, session_number, title,
-                      topics_json, scheduled_date, estimated_duration, requirements_json, study_guide))
-                conn.commit()
-                return session_id
+            session_id, = self.create_study_sessions(study_plan_id, course_id, user_id, [{
+                'session_number': session_number, 'title': title, 'topics': topics,
+                'scheduled_date': scheduled_date, 'estimated_duration': estimated_duration,
+                'content_requirements': content_requirements, 'study_guide': study_guide
+            }])
+            return session_id
         except Exception as e:
             print(f"Error adding study session: {e}")
             return None
@@ -780,22 +1259,53 @@ class Database:
         sessions = []
         with self.get_connection() as conn:
             rows = conn.execute(
-                'SELECT * FROM study_sessions WHERE study_plan_id = ? ORDER BY session_number ASC',
+                f'SELECT {self._STUDY_SESSION_COLUMNS} FROM study_sessions '
+                'WHERE study_plan_id = ? ORDER BY session_number ASC',
                 (study_plan_id,)
             ).fetchall()
             
             for row in rows:
-                sessions.append(StudySession(
-                    row['id'], row['study_plan_id'], row['course_id'], row['user_id'],
-                    row['session_number'], row['title'], row['topics'], row['scheduled_date'],
-                    row['estimated_duration'], row['content_requirements'], row['study_guide'],
-                    row['status'], row['completed_at'], row['validation_score'], row['notes']
-                ))
+                sessions.append(StudySession(*row))
         return sessions
 
+    def get_study_sessions_data(self, study_plan_id: str) -> List[Dict[str, Any]]:
+        """Get a study plan's sessions as response-ready dictionaries, built straight from the rows"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None  # Plain tuples; the fields are unpacked by position below
+            rows = cursor.execute('''
+                SELECT id, study_plan_id, course_id, user_id, session_number, title, topics,
+                       scheduled_date, estimated_duration, content_requirements, study_guide,
+                       status, completed_at, validation_score, notes
+                FROM study_sessions WHERE study_plan_id = ? ORDER BY session_number ASC
+            ''', (study_plan_id,)).fetchall()
+        
+        return [
+            {
+                'id': session_id,
+                'study_plan_id': plan_id,
+                'course_id': course_id,
+                'user_id': user_id,
+                'session_number': session_number,
+                'title': title,
+                'topics': json_loads(topics),
+                'scheduled_date': scheduled_date,
+                'estimated_duration': estimated_duration,
+                'content_requirements': json_loads(content_requirements),
+                'study_guide': study_guide,
+                'status': status,
+                'completed_at': completed_at,
+                'validation_score': validation_score,
+                'notes': notes
+            }
+            for (session_id, plan_id, course_id, user_id, session_number, title, topics,
+                 scheduled_date, estimated_duration, content_requirements, study_guide,
+                 status, completed_at, validation_score, notes) in rows
+        ]
+
     def complete_study_session(self, session_id: str, validation_score: float, notes: str = "") -> bool:
         """Mark a study session as completed"""
-        completed_at = datetime.utcnow().isoformat()
+        completed_at = utc_now().isoformat()
         
         try:
             with self.get_connection() as conn:
@@ -810,5 +1320,64 @@ class Database:
             print(f"Error completing study session: {e}")
             return False
 
+    def attach_material_to_pending_sessions(self, study_plan_id: str, week_number: int, material_id: str) -> int:
+        """
+        Add a material to every session of a plan still waiting on that week's content
+        and mark their content as uploaded. Matching and updating the JSON happens in
+        SQLite, so the sessions are never decoded in Python. Returns the number updated.
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute('''
+                    UPDATE study_sessions
+                    SET content_requirements = json_set(
+                        json_insert(content_requirements, '$.required_materials[#]', :material_id),
+                        '$.content_status', 'uploaded'
+                    )
+                    WHERE study_plan_id = :study_plan_id
+                      AND json_extract(content_requirements, '$.week_number') = :week_number
+                      AND json_extract(content_requirements, '$.content_status') = 'pending'
+                ''', {'study_plan_id': study_plan_id, 'week_number': week_number, 'material_id': material_id})
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            print(f"Error attaching material to study sessions: {e}")
+            return 0
+
+    # Generated Response Methods
+    def get_generated_response(self, prompt_key: str) -> Optional[str]:
+        """Get a stored agent response if it has not expired"""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                'SELECT response FROM generated_responses WHERE prompt_key = ? AND expires_at > ?',
+                (prompt_key, time.time())
+            ).fetchone()
+            return row['response'] if row else None
+
+    def delete_expired_generated_responses(self) -> int:
+        """Delete stored agent responses past their expiry and return how many were removed"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute('DELETE FROM generated_responses WHERE expires_at <= ?', (time.time(),))
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            print(f"Error deleting expired generated responses: {e}")
+            return 0
+
+    def save_generated_response(self, prompt_key: str, response: str, expires_at: float) -> bool:
+        """Store an agent response, replacing any previous one for the same key"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO generated_responses (prompt_key, response, created_at, expires_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (prompt_key, response, utc_now().isoformat(), expires_at))
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Error saving generated response: {e}")
+            return False
+
 # Global database instance
 db = Database()
@@ -0,0 +1,72 @@
+"""
+Request Schemas Module
+Decodes and validates JSON request bodies for the generation endpoints.
+Uses decoders precompiled by msgspec when it is installed, otherwise
+falls back to the standard json module with the same type checks.
+"""
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple, get_args, get_origin
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class RequestValidationError(ValueError):
+    """Raised when a request body is not valid JSON or does not match its schema."""
+
+
+class RequestSchema:
+    """
+    Schema for a JSON object request body.
+    Fields map a name to a (type, default) pair; types are str or List[str].
+    """
+
+    def __init__(self, name: str, **fields: Tuple[Any, Any]):
+        self.name = name
+        self.fields = fields
+        self._decoder = None
+        if msgspec:
+            struct = msgspec.defstruct(
+                name, [(field, field_type, default) for field, (field_type, default) in fields.items()]
+            )
+            self._decoder = msgspec.json.Decoder(struct)
+
+    def decode(self, body: bytes):
+        """Parse and validate a request body, returning an object with one attribute per field."""
+        if self._decoder:
+            try:
+                return self._decoder.decode(body)
+            except msgspec.DecodeError as e:
+                raise RequestValidationError(str(e))
+
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise RequestValidationError(f"Invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise RequestValidationError(f"Expected `object`, got `{type(data).__name__}`")
+
+        values: Dict[str, Any] = {}
+        for field, (field_type, default) in self.fields.items():
+            value = data.get(field, default)
+            if not self._matches(value, field_type):
+                raise RequestValidationError(f"Invalid value for `{field}`")
+            values[field] = value
+        return SimpleNamespace(**values)
+
+    @staticmethod
+    def _matches(value: Any, field_type: Any) -> bool:
+        """Check a decoded value against str or List[str]."""
+        origin = get_origin(field_type)
+        if origin is None:
+            return isinstance(value, field_type)
+        item_type, = get_args(field_type)
+        return isinstance(value, origin) and all(isinstance(item, item_type) for item in value)
+
+
+FLASHCARDS_REQUEST = RequestSchema('FlashcardsRequest', content=(str, ''))
+EXAM_REQUEST = RequestSchema('ExamRequest', topics=(List[str], []), difficulty=(str, 'medium'))
+STUDY_PLAN_REQUEST = RequestSchema('StudyPlanRequest', subjects=(List[str], []), timeframe=(str, '1 week'))
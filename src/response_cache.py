@@ -0,0 +1,94 @@
+"""
+Response Cache Module
+Caches agent responses for the generation endpoints so repeated requests
+for the same content, topics or subjects from the same user skip the LLM call.
+Entries are kept in process and, when a store is given, in the database
+so they survive restarts and are shared between workers.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Generated responses are reused for an hour
+RESPONSE_CACHE_TTL_SECONDS = 60 * 60
+RESPONSE_CACHE_MAX_SIZE = 512
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different inputs share a key."""
+    return _WHITESPACE_PATTERN.sub(' ', str(text)).strip().lower()
+
+
+def normalize_items(items) -> Tuple[str, ...]:
+    """Normalize a list of topics or subjects, ignoring order and duplicates."""
+    return tuple(sorted({normalize_text(item) for item in items}))
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU of agent responses with a TTL, optionally backed
+    by a store with get_generated_response, save_generated_response and
+    delete_expired_generated_responses.
+    Keys are (endpoint, user id, normalized request fields) tuples; responses
+    can draw on the user's own courses, so they are never shared across users.
+    """
+
+    def __init__(self, store=None, ttl: int = RESPONSE_CACHE_TTL_SECONDS,
+                 max_size: int = RESPONSE_CACHE_MAX_SIZE):
+        self.store = store
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prompt_key(key: tuple) -> str:
+        """Stable digest of a cache key for persistent storage."""
+        return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the cached response for a key if it has not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    return response
+                del self._entries[key]
+
+        if self.store is None:
+            return None
+        response = self.store.get_generated_response(self.prompt_key(key))
+        if response is None:
+            # A miss is followed by a slow agent call anyway, so prune expired rows here
+            self.store.delete_expired_generated_responses()
+            return None
+        self._remember(key, response, time.time() + self.ttl)
+        return response
+
+    def set(self, key: tuple, response: str) -> None:
+        """Store a response in process and in the backing store."""
+        expires_at = time.time() + self.ttl
+        self._remember(key, response, expires_at)
+        if self.store is not None:
+            self.store.save_generated_response(self.prompt_key(key), response, expires_at)
+
+    def _remember(self, key: tuple, response: str, expires_at: float) -> None:
+        """Keep a response in process, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,79 @@
+"""
+Session Store Module
+Keeps per-user uploaded file content outside the Flask worker so it
+survives restarts and is shared between workers. Falls back to a
+process-local dictionary when Redis is not configured.
+
+ADK session ids are not stored here: the sessions themselves live in each
+worker's InMemorySessionService, so their ids are kept process-local in main.
+"""
+import json
+from typing import Optional, Dict, Any
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Uploaded files expire after 24 hours
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+
+class SessionStore:
+    """
+    Stores recently uploaded file content per user.
+    Uses Redis when a URL is provided, otherwise an in-memory dictionary.
+    If Redis fails after startup, each call falls back to the in-memory
+    dictionary, so requests keep working on this worker.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        """Connect to Redis if available, falling back to in-memory storage."""
+        self._redis = None
+        self._uploads = {}
+
+        if redis_url and redis:
+            try:
+                client = redis.Redis.from_url(redis_url)
+                client.ping()
+                self._redis = client
+            except redis.RedisError as e:
+                print(f"Warning: Could not connect to Redis. Using in-memory store. Error: {e}")
+        elif redis_url:
+            print("Warning: REDIS_URL is set but the redis package is not installed. Using in-memory store.")
+
+    @property
+    def backend(self) -> str:
+        """Name of the active storage backend."""
+        return "redis" if self._redis else "memory"
+
+    def get_uploads(self, user_key: str) -> Optional[Dict[str, Any]]:
+        """Return the uploaded file content for a user, if any."""
+        if self._redis:
+            try:
+                raw = self._redis.get(f"uploads:{user_key}")
+                if raw:
+                    return json.loads(raw)
+            except redis.RedisError as e:
+                print(f"Warning: Redis read failed. Using in-memory store. Error: {e}")
+        return self._uploads.get(user_key)
+
+    def set_uploads(self, user_key: str, upload_data: Dict[str, Any]) -> None:
+        """Replace the uploaded file content for a user."""
+        if self._redis:
+            try:
+                self._redis.setex(f"uploads:{user_key}", SESSION_TTL_SECONDS, json.dumps(upload_data))
+                self._uploads.pop(user_key, None)
+                return
+            except redis.RedisError as e:
+                print(f"Warning: Redis write failed. Using in-memory store. Error: {e}")
+        self._uploads[user_key] = upload_data
+
+    def clear_uploads(self, user_key: str) -> None:
+        """Remove the uploaded file content for a user."""
+        self._uploads.pop(user_key, None)
+        if self._redis:
+            try:
+                self._redis.delete(f"uploads:{user_key}")
+            except redis.RedisError as e:
+                print(f"Warning: Redis delete failed. Error: {e}")
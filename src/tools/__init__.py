@@ -7,6 +7,7 @@ from .file_ingestion_tools import (
     extract_text_from_docx,
     extract_text_from_txt,
     process_uploaded_file,
+    process_uploaded_stream,
     chunk_content_for_analysis,
     analyze_content_structure
 )
@@ -16,6 +17,7 @@ __all__ = [
     'extract_text_from_docx', 
     'extract_text_from_txt',
     'process_uploaded_file',
+    'process_uploaded_stream',
     'chunk_content_for_analysis',
     'analyze_content_structure'
 ]
@@ -4,8 +4,9 @@ Tools for processing PDFs, DOCs, TXT files and making content available to agent
 """
 
 import os
+import re
 import tempfile
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union, BinaryIO
 import json
 from datetime import datetime
 
@@ -22,6 +23,11 @@ try:
 except ImportError:
     DocxDocument = None
 
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
 def extract_text_from_pdf(file_path: str) -> Dict[str, Any]:
     """
     Extract text content from PDF files
@@ -32,13 +38,27 @@ def extract_text_from_pdf(file_path: str) -> Dict[str, Any]:
     Returns:
         Dictionary with extracted text and metadata
     """
+    return _extract_pdf(file_path)
+
+def _join_pages(page_texts) -> Tuple[str, int]:
+    """Join extracted page texts under page markers once, counting words per page as they arrive"""
+    parts = []
+    word_count = 0
+    for page_num, page_text in enumerate(page_texts, 1):
+        if page_text:
+            part = f"\n--- Page {page_num} ---\n{page_text}\n"
+            parts.append(part)
+            word_count += len(part.split())
+    return "".join(parts).strip(), word_count
+
+def _extract_pdf(source: Union[str, BinaryIO]) -> Dict[str, Any]:
+    """Extract PDF text from a file path or a binary file-like object"""
     try:
-        extracted_text = ""
         metadata = {}
         
         # Try pdfplumber first (better for complex layouts)
         if pdfplumber:
-            with pdfplumber.open(file_path) as pdf:
+            with pdfplumber.open(source) as pdf:
                 metadata = {
                     "pages": len(pdf.pages),
                     "title": pdf.metadata.get('Title', ''),
@@ -46,25 +66,18 @@ def extract_text_from_pdf(file_path: str) -> Dict[str, Any]:
                     "creator": pdf.metadata.get('Creator', '')
                 }
                 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        extracted_text += f"\n--- Page {page_num} ---\n{page_text}\n"
+                extracted_text, word_count = _join_pages(page.extract_text() for page in pdf.pages)
         
         # Fallback to PyPDF2
         elif PyPDF2:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata = {
-                    "pages": len(pdf_reader.pages),
-                    "title": pdf_reader.metadata.get('/Title', '') if pdf_reader.metadata else '',
-                    "author": pdf_reader.metadata.get('/Author', '') if pdf_reader.metadata else ''
-                }
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        extracted_text += f"\n--- Page {page_num} ---\n{page_text}\n"
+            pdf_reader = PyPDF2.PdfReader(source)
+            metadata = {
+                "pages": len(pdf_reader.pages),
+                "title": pdf_reader.metadata.get('/Title', '') if pdf_reader.metadata else '',
+                "author": pdf_reader.metadata.get('/Author', '') if pdf_reader.metadata else ''
+            }
+            
+            extracted_text, word_count = _join_pages(page.extract_text() for page in pdf_reader.pages)
         else:
             return {
                 "status": "error",
@@ -73,10 +86,10 @@ def extract_text_from_pdf(file_path: str) -> Dict[str, Any]:
         
         return {
             "status": "success",
-            "content": extracted_text.strip(),
+            "content": extracted_text,
             "metadata": metadata,
             "content_type": "pdf",
-            "word_count": len(extracted_text.split()),
+            "word_count": word_count,
             "extraction_method": "pdfplumber" if pdfplumber else "PyPDF2"
         }
         
@@ -96,6 +109,10 @@ def extract_text_from_docx(file_path: str) -> Dict[str, Any]:
     Returns:
         Dictionary with extracted text and metadata
     """
+    return _extract_docx(file_path)
+
+def _extract_docx(source: Union[str, BinaryIO]) -> Dict[str, Any]:
+    """Extract DOCX text from a file path or a binary file-like object"""
     try:
         if not DocxDocument:
             return {
@@ -103,13 +120,11 @@ def extract_text_from_docx(file_path: str) -> Dict[str, Any]:
                 "error": "python-docx library not available. Install python-docx."
             }
         
-        doc = DocxDocument(file_path)
+        doc = DocxDocument(source)
         
-        # Extract text from paragraphs
-        paragraphs = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                paragraphs.append(paragraph.text.strip())
+        # Extract text from paragraphs, reading each paragraph's text once
+        paragraphs = [text for text in (paragraph.text.strip() for paragraph in doc.paragraphs) if text]
+        word_count = sum(len(text.split()) for text in paragraphs)
         
         extracted_text = "\n\n".join(paragraphs)
         
@@ -125,13 +140,10 @@ def extract_text_from_docx(file_path: str) -> Dict[str, Any]:
         }
         
         # Extract tables if present
-        table_content = []
-        for table in doc.tables:
-            table_data = []
-            for row in table.rows:
-                row_data = [cell.text.strip() for cell in row.cells]
-                table_data.append(row_data)
-            table_content.append(table_data)
+        table_content = [
+            [[cell.text.strip() for cell in row.cells] for row in table.rows]
+            for table in doc.tables
+        ]
         
         return {
             "status": "success",
@@ -139,7 +151,7 @@ def extract_text_from_docx(file_path: str) -> Dict[str, Any]:
             "metadata": metadata,
             "tables": table_content,
             "content_type": "docx",
-            "word_count": len(extracted_text.split())
+            "word_count": word_count
         }
         
     except Exception as e:
@@ -159,33 +171,44 @@ def extract_text_from_txt(file_path: str) -> Dict[str, Any]:
         Dictionary with extracted text and metadata
     """
     try:
-        # Try different encodings
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-        content = None
-        used_encoding = None
-        
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    content = file.read()
-                    used_encoding = encoding
-                    break
-            except UnicodeDecodeError:
-                continue
-        
-        if content is None:
-            return {
-                "status": "error",
-                "error": "Could not decode text file with any common encoding"
-            }
+        with open(file_path, 'rb') as file:
+            raw = file.read()
         
         # Get file stats
         file_stats = os.stat(file_path)
+        return _extract_txt(raw, datetime.fromtimestamp(file_stats.st_mtime).isoformat())
+        
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": f"Failed to extract TXT content: {str(e)}"
+        }
+
+def _extract_txt(raw: bytes, modified: Optional[str] = None) -> Dict[str, Any]:
+    """Decode raw text file bytes and build the extraction result"""
+    try:
+        # Most uploads are UTF-8; only detect the encoding when that fails
+        try:
+            content = raw.decode('utf-8')
+            used_encoding = 'utf-8'
+        except UnicodeDecodeError:
+            best_match = charset_normalizer.from_bytes(raw).best() if charset_normalizer else None
+            if best_match:
+                content = str(best_match)
+                used_encoding = best_match.encoding
+            else:
+                # latin-1 maps every byte, so this always succeeds
+                content = raw.decode('latin-1')
+                used_encoding = 'latin-1'
+        
+        # Normalize newlines the same way text-mode reads do
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        
         metadata = {
             "encoding": used_encoding,
-            "size_bytes": file_stats.st_size,
-            "modified": datetime.fromtimestamp(file_stats.st_mtime).isoformat(),
-            "lines": len(content.split('\n'))
+            "size_bytes": len(raw),
+            "modified": modified or datetime.now().isoformat(),
+            "lines": content.count('\n') + 1
         }
         
         return {
@@ -213,14 +236,31 @@ def process_uploaded_file(file_path: str, filename: str) -> Dict[str, Any]:
     Returns:
         Dictionary with extracted content and processing results
     """
+    return _process_file(file_path, filename)
+
+def process_uploaded_stream(fileobj: BinaryIO, filename: str) -> Dict[str, Any]:
+    """
+    Process an uploaded file from an in-memory or spooled stream without writing it to disk
+    
+    Args:
+        fileobj: Seekable binary file-like object positioned at the start of the file
+        filename: Original filename
+        
+    Returns:
+        Dictionary with extracted content and processing results
+    """
+    return _process_file(fileobj, filename)
+
+def _process_file(source: Union[str, BinaryIO], filename: str) -> Dict[str, Any]:
+    """Dispatch extraction on the file extension for a path or a binary stream"""
     try:
         # Determine file type from extension
         file_ext = os.path.splitext(filename)[1].lower()
         
         if file_ext == '.pdf':
-            result = extract_text_from_pdf(file_path)
+            result = _extract_pdf(source)
         elif file_ext in ['.docx']:
-            result = extract_text_from_docx(file_path)
+            result = _extract_docx(source)
         elif file_ext in ['.doc']:
             # For .doc files, suggest conversion to .docx
             return {
@@ -228,7 +268,10 @@ def process_uploaded_file(file_path: str, filename: str) -> Dict[str, Any]:
                 "error": "Legacy .doc files not supported. Please convert to .docx format."
             }
         elif file_ext in ['.txt']:
-            result = extract_text_from_txt(file_path)
+            if isinstance(source, str):
+                result = extract_text_from_txt(source)
+            else:
+                result = _extract_txt(source.read())
         else:
             return {
                 "status": "error",
@@ -250,6 +293,9 @@ def process_uploaded_file(file_path: str, filename: str) -> Dict[str, Any]:
             "error": f"Failed to process file {filename}: {str(e)}"
         }
 
+# Sentence and paragraph endings a chunk may break after
+_CHUNK_BOUNDARY_PATTERN = re.compile(r'[.!?\n]')
+
 def chunk_content_for_analysis(content: str) -> List[Dict[str, Any]]:
     """
     Split large content into manageable chunks for agent processing with default settings
@@ -282,11 +328,10 @@ def chunk_content_for_analysis(content: str) -> List[Dict[str, Any]]:
             
             # Try to find a good breaking point (sentence or paragraph)
             if end < len(content):
-                # Look for sentence endings near the end
-                for i in range(end - 100, end):
-                    if i > start and content[i] in '.!?\n':
-                        end = i + 1
-                        break
+                # Look for the first sentence ending in the last 100 characters
+                boundary = _CHUNK_BOUNDARY_PATTERN.search(content, max(end - 100, start + 1), end)
+                if boundary:
+                    end = boundary.end()
             
             chunk_content = content[start:end].strip()
             if chunk_content:
@@ -311,6 +356,14 @@ def chunk_content_for_analysis(content: str) -> List[Dict[str, Any]]:
             "word_count": len(content.split())
         }]
 
+# Line prefixes that mark a potential heading or a list item
+_HEADING_PREFIXES = ('Chapter', 'Section', 'Part', '1.', '2.', '3.')
+_LIST_PREFIXES = ('•', '-', '*', '1.', '2.', '3.', 'a)', 'b)', 'c)')
+
+# How many headings and list items the structure analysis reports
+MAX_HEADINGS = 10
+MAX_LIST_ITEMS = 20
+
 def analyze_content_structure(content: str) -> Dict[str, Any]:
     """
     Analyze the structure and characteristics of extracted content
@@ -333,40 +386,41 @@ def analyze_content_structure(content: str) -> Dict[str, Any]:
             "average_words_per_line": len(words) / len(lines) if lines else 0
         }
         
-        # Identify potential sections/headings
+        # Identify potential sections/headings and lists in one pass
         potential_headings = []
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if line:
-                # Check for typical heading patterns
-                if (len(line) < 100 and 
-                    (line.isupper() or 
-                     line.startswith(('Chapter', 'Section', 'Part', '1.', '2.', '3.')) or
-                     line.endswith(':'))):
-                    potential_headings.append({
-                        "line_number": i + 1,
-                        "text": line
-                    })
-        
-        # Identify lists
-        list_indicators = ['•', '-', '*', '1.', '2.', '3.', 'a)', 'b)', 'c)']
         list_items = []
         for i, line in enumerate(lines):
             line = line.strip()
-            for indicator in list_indicators:
-                if line.startswith(indicator):
-                    list_items.append({
-                        "line_number": i + 1,
-                        "text": line
-                    })
-                    break
+            if not line:
+                continue
+            
+            # Check for typical heading patterns
+            if (len(potential_headings) < MAX_HEADINGS and
+                len(line) < 100 and 
+                (line.isupper() or 
+                 line.startswith(_HEADING_PREFIXES) or
+                 line.endswith(':'))):
+                potential_headings.append({
+                    "line_number": i + 1,
+                    "text": line
+                })
+            
+            if len(list_items) < MAX_LIST_ITEMS and line.startswith(_LIST_PREFIXES):
+                list_items.append({
+                    "line_number": i + 1,
+                    "text": line
+                })
+            
+            # Nothing more will be reported once both lists are full
+            if len(potential_headings) >= MAX_HEADINGS and len(list_items) >= MAX_LIST_ITEMS:
+                break
         
         return {
             "status": "success",
             "statistics": stats,
             "structure": {
-                "potential_headings": potential_headings[:10],  # Limit to first 10
-                "list_items": list_items[:20],  # Limit to first 20
+                "potential_headings": potential_headings,
+                "list_items": list_items,
                 "has_tables": "---" in content or "|" in content,
                 "has_code": "```" in content or "def " in content or "function " in content
             }
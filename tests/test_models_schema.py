@@ -0,0 +1,77 @@
+"""
+Tests for the database schema migrations and connection setup
+"""
+import sqlite3
+
+import pytest
+
+pytest.importorskip('flask_login')
+
+
+@pytest.fixture(scope='module')
+def models(tmp_path_factory, request):
+    # Importing models opens the default database in the working directory
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.chdir(tmp_path_factory.mktemp('cwd'))
+    request.addfinalizer(monkeypatch.undo)
+    import models
+    return models
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def build_v1_database(models, path):
+    """Create a version 1 database holding one course material with inline text"""
+    conn = sqlite3.connect(path)
+    for statement in models.sql_statements(models.SCHEMA_SQL):
+        conn.execute(statement)
+    conn.execute("INSERT INTO users VALUES ('u1', 'a@example.com', 'a', 'hash', 't', '{}')")
+    conn.execute("INSERT INTO courses VALUES ('c1', 'u1', 'Course', '', '{}', 't', '{}')")
+    conn.execute(
+        "INSERT INTO course_materials (id, course_id, user_id, title, content_type, content_text, uploaded_at) "
+        "VALUES ('m1', 'c1', 'u1', 'Notes', 'lecture_notes', 'week one notes', 't')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_new_database_is_created_at_the_current_version(models, tmp_path):
+    path = str(tmp_path / 'new.db')
+    models.Database(path)
+    assert user_version(path) == models.SCHEMA_VERSION
+
+
+def test_migrations_upgrade_an_existing_v1_database(models, tmp_path):
+    path = str(tmp_path / 'v1.db')
+    build_v1_database(models, path)
+    assert user_version(path) == 1
+
+    db = models.Database(path)
+    assert user_version(path) == models.SCHEMA_VERSION
+    material, = db.get_course_materials('c1')
+    assert material['content_text'] == 'week one notes'
+
+    # Opening the database again leaves the migrated schema alone
+    models.Database(path)
+    assert user_version(path) == models.SCHEMA_VERSION
+
+
+def test_applied_migration_is_skipped(models, tmp_path):
+    path = str(tmp_path / 'current.db')
+    db = models.Database(path)
+    with db.get_connection() as conn:
+        version, script = models.SCHEMA_MIGRATIONS[-1]
+        assert models.apply_schema_script(conn, version, script) is False
+
+
+def test_pooled_connections_enforce_foreign_keys(models, tmp_path):
+    db = models.Database(str(tmp_path / 'fk.db'))
+    with db.get_connection() as conn:
+        assert conn.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
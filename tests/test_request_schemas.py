@@ -0,0 +1,35 @@
+"""
+Tests for request body decoding and validation
+"""
+import pytest
+
+from request_schemas import EXAM_REQUEST, FLASHCARDS_REQUEST, STUDY_PLAN_REQUEST, RequestValidationError
+
+
+def test_valid_body_is_decoded():
+    req = EXAM_REQUEST.decode(b'{"topics": ["cells", "dna"], "difficulty": "hard"}')
+    assert req.topics == ['cells', 'dna']
+    assert req.difficulty == 'hard'
+
+
+def test_missing_fields_take_defaults():
+    req = STUDY_PLAN_REQUEST.decode(b'{}')
+    assert req.subjects == []
+    assert req.timeframe == '1 week'
+
+
+@pytest.mark.parametrize('body', [
+    b'not json',
+    b'["a list"]',
+    b'{"topics": "cells"}',
+    b'{"topics": ["cells", 3]}',
+    b'{"difficulty": 5}',
+])
+def test_bad_exam_payloads_are_rejected(body):
+    with pytest.raises(RequestValidationError):
+        EXAM_REQUEST.decode(body)
+
+
+def test_bad_flashcards_content_is_rejected():
+    with pytest.raises(RequestValidationError):
+        FLASHCARDS_REQUEST.decode(b'{"content": ["not", "a", "string"]}')
@@ -0,0 +1,81 @@
+"""
+Tests for the generation endpoints' response cache
+"""
+import time
+
+from response_cache import ResponseCache, normalize_items, normalize_text
+
+
+class FakeStore:
+    """In-memory stand-in for the Database generated_responses methods"""
+
+    def __init__(self):
+        self.rows = {}
+        self.prunes = 0
+
+    def get_generated_response(self, prompt_key):
+        row = self.rows.get(prompt_key)
+        if row and row[1] > time.time():
+            return row[0]
+        return None
+
+    def save_generated_response(self, prompt_key, response, expires_at):
+        self.rows[prompt_key] = (response, expires_at)
+        return True
+
+    def delete_expired_generated_responses(self):
+        self.prunes += 1
+        now = time.time()
+        for key in [key for key, (_, expires_at) in self.rows.items() if expires_at <= now]:
+            del self.rows[key]
+
+
+def test_miss_then_hit():
+    cache = ResponseCache()
+    key = ('flashcards', 'user-1', normalize_text('Photosynthesis'))
+    assert cache.get(key) is None
+    cache.set(key, 'cards')
+    assert cache.get(key) == 'cards'
+
+
+def test_keys_are_scoped_per_user():
+    cache = ResponseCache()
+    cache.set(('flashcards', 'user-1', 'cells'), 'cards for user 1')
+    assert cache.get(('flashcards', 'user-2', 'cells')) is None
+
+
+def test_entries_expire():
+    cache = ResponseCache(ttl=0.01)
+    cache.set(('exam', 'user-1', ('a',), 'easy'), 'exam')
+    time.sleep(0.02)
+    assert cache.get(('exam', 'user-1', ('a',), 'easy')) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_size=2)
+    cache.set(('k', 1), 'one')
+    cache.set(('k', 2), 'two')
+    cache.get(('k', 1))
+    cache.set(('k', 3), 'three')
+    assert cache.get(('k', 2)) is None
+    assert cache.get(('k', 1)) == 'one'
+
+
+def test_store_backs_the_process_cache():
+    store = FakeStore()
+    ResponseCache(store).set(('study_plan', 'user-1', ('math',), '1 week'), 'plan')
+    fresh = ResponseCache(store)
+    assert fresh.get(('study_plan', 'user-1', ('math',), '1 week')) == 'plan'
+
+
+def test_store_miss_prunes_expired_rows():
+    store = FakeStore()
+    store.save_generated_response('stale', 'old', time.time() - 1)
+    assert ResponseCache(store).get(('flashcards', 'user-1', 'x')) is None
+    assert store.prunes == 1
+    assert 'stale' not in store.rows
+
+
+def test_normalization():
+    assert normalize_text('  Cell   Biology ') == 'cell biology'
+    assert normalize_items(['B', 'a', 'b']) == ('a', 'b')